@@ -2,10 +2,12 @@ import streamlit as st
 import pandas as pd
 import tempfile
 import os
+import time
 import base64
 from io import BytesIO
 from menu_processor import MenuProcessor
-from extract_text import extract_text
+from result_cache import ResultCache
+from extract_text import extract_text, spooled_upload
 from dotenv import load_dotenv
 from docx import Document
 from fpdf import FPDF
@@ -20,6 +22,11 @@ except ImportError:
 
 load_dotenv()
 OPENAI_API_KEY = os.getenv("API")
+# openai, or router to spread chunks over the backends in LLM_ROUTER_BACKENDS
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+
+# Minimum interval between redraws of the table while items stream in
+TABLE_REFRESH_SECONDS = 0.3
 
 
 def init_page():
@@ -27,6 +34,12 @@ def init_page():
     st.title("📋 AI Menu Card Processor")
 
 
+@st.cache_resource
+def get_result_cache():
+    """One result cache per server process, shared across sessions"""
+    return ResultCache(cache_dir=os.getenv("MENU_CACHE_DIR", ".menu_cache"))
+
+
 def get_labels(lang):
     labels = {
         "English": {
@@ -253,7 +266,7 @@ def main():
     )
 
     # Initialize processor
-    processor = MenuProcessor(llm_provider="openai", api_key=OPENAI_API_KEY)
+    processor = MenuProcessor(llm_provider=LLM_PROVIDER, api_key=OPENAI_API_KEY, cache=get_result_cache())
 
     if uploaded_file:
         left_col, right_col = st.columns([3, 2])
@@ -261,8 +274,38 @@ def main():
         with st.spinner(labels["processing"]):
             try:
                 uploaded_file.seek(0)
-                file_bytes = uploaded_file.read()
-                items = processor.process_menu_file(file_bytes, filename=uploaded_file.name)
+                # Large uploads are extracted from a temporary file instead of in-memory copies
+                suffix = os.path.splitext(uploaded_file.name)[1]
+                with left_col:
+                    live_table = st.empty()
+                items = []
+                last_refresh = 0.0
+                with spooled_upload(uploaded_file, suffix=suffix) as source:
+                    # Items appear in the table while the LLM is still writing the rest
+                    for item in processor.iter_menu_items(source, filename=uploaded_file.name):
+                        items.append(item)
+                        if time.monotonic() - last_refresh > TABLE_REFRESH_SECONDS:
+                            live_table.dataframe(pd.DataFrame(items), use_container_width=True)
+                            last_refresh = time.monotonic()
+                live_table.empty()
+                if processor.last_report.get("time_to_first_item") is not None:
+                    st.caption(f"First item after {processor.last_report['time_to_first_item']:.1f}s, "
+                               f"{len(items)} items in {processor.last_report['seconds']:.1f}s, "
+                               f"{processor.last_report['rule_based_share'] or 0:.0%} parsed without the LLM")
+                if processor.last_report.get("escalation_rate") is not None:
+                    st.caption(f"{processor.cascade_model} answered {processor.last_report['cascade_chunks']} chunks, "
+                               f"{processor.last_report['escalation_rate']:.0%} escalated to {processor.model}")
+                for failure in processor.last_errors:
+                    st.warning(f"Warning: Some items might not be processed correctly (chunk {failure['chunk'] + 1}): {failure['error']}")
+                cache_stats = getattr(processor.llm, "cache_stats", lambda: None)()
+                if cache_stats and cache_stats["hits"]:
+                    st.caption(f"LLM response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                               f"{cache_stats['saved_seconds']:.1f}s and "
+                               f"{cache_stats['saved_prompt_tokens'] + cache_stats['saved_completion_tokens']} tokens saved")
+                connection_stats = getattr(processor.llm, "connection_stats", lambda: None)()
+                if connection_stats and connection_stats["reuse_rate"] is not None:
+                    st.caption(f"LLM connections: {connection_stats['connections']} opened for "
+                               f"{connection_stats['requests']} requests, {connection_stats['reuse_rate']:.0%} reused")
 
                 df = pd.DataFrame(items)
 
@@ -317,13 +360,13 @@ def main():
 
                 with right_col:
                     st.header(labels["original_file"])
-                    show_file_preview(file_bytes, uploaded_file.name)
+                    show_file_preview(uploaded_file.getvalue(), uploaded_file.name)
 
             except Exception as e:
                 st.error(f"{labels['error']} {str(e)}")
                 with st.expander("Debug Information"):
                     st.write(f"File name: {uploaded_file.name}")
-                    st.write(f"File size: {len(file_bytes) if 'file_bytes' in locals() else 'Unknown'} bytes") # type: ignore
+                    st.write(f"File size: {uploaded_file.size} bytes")
                     st.write(f"File type: {uploaded_file.type}")
 
     else:
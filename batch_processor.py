@@ -0,0 +1,373 @@
+"""
+Offline batch mode for large catalog imports.
+
+Every chunk prompt of every menu file is written to <job_dir>/requests.jsonl,
+submitted to a batch-completion backend, and once the batch is done the
+results are mapped back to their file and chunk, parsed and written as one
+CSV per menu file.
+
+Usage:
+    python batch_processor.py prepare JOB_DIR menu1.pdf menu2.jpg ...
+    python batch_processor.py submit JOB_DIR [--backend openai|local]
+    python batch_processor.py wait JOB_DIR [--poll-interval 60]
+    python batch_processor.py collect JOB_DIR --template items_empty.csv --out OUT_DIR
+    python batch_processor.py run JOB_DIR menu1.pdf ... --template items_empty.csv --out OUT_DIR
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from item_merge import ChunkItemMerger
+from llm_clients.factory import get_shared_llm_client
+from menu_processor import PROMPT_VERSION, MenuProcessor
+
+REQUESTS_FILE = "requests.jsonl"
+# Items the line parser resolved without the LLM, keyed like the requests
+PARSED_FILE = "parsed.jsonl"
+RESULTS_FILE = "results.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+# OpenAI batch limit per input file
+MAX_BATCH_REQUESTS = 50000
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Batch states after which polling stops
+FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+# Preparing and collecting a job only builds prompts and parses responses, no request
+# is sent, so the processor for those steps works without an API key
+OFFLINE_API_KEY = "offline"
+
+
+class BatchBackend(ABC):
+    """A service that runs a JSONL file of chat-completion requests asynchronously"""
+
+    @abstractmethod
+    def submit(self, requests_path: str) -> str:
+        """Upload the request file and start the batch, return its id"""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """One of validating, in_progress, finalizing, completed, failed, expired, cancelled"""
+
+    @abstractmethod
+    def download_results(self, batch_id: str, results_path: str) -> None:
+        """Write the output and error lines of a finished batch to results_path"""
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API, about half the price of interactive calls with a 24h completion window"""
+
+    def __init__(self, api_key: Optional[str] = None, completion_window: str = "24h"):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key or os.getenv("API"))
+        self.completion_window = completion_window
+
+    def submit(self, requests_path: str) -> str:
+        with open(requests_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT,
+                                           completion_window=self.completion_window)
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download_results(self, batch_id: str, results_path: str) -> None:
+        batch = self.client.batches.retrieve(batch_id)
+        with open(results_path, "w", encoding="utf-8") as out:
+            # Successful requests go to the output file, failed ones to the error file
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                text = self.client.files.content(file_id).text
+                out.write(text if text.endswith("\n") or not text else text + "\n")
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    File-based stand-in for tests and local runs. Requests are answered by
+    complete(body) -> response text, one after another, on the first status poll.
+    """
+
+    def __init__(self, root: str, complete: Callable[[Dict], str]):
+        self.root = root
+        self.complete = complete
+
+    def submit(self, requests_path: str) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        os.makedirs(self._dir(batch_id))
+        shutil.copyfile(requests_path, os.path.join(self._dir(batch_id), "input.jsonl"))
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        output = os.path.join(self._dir(batch_id), "output.jsonl")
+        if not os.path.exists(output):
+            self._run(batch_id, output)
+        return "completed"
+
+    def download_results(self, batch_id: str, results_path: str) -> None:
+        self.status(batch_id)
+        shutil.copyfile(os.path.join(self._dir(batch_id), "output.jsonl"), results_path)
+
+    def _dir(self, batch_id):
+        return os.path.join(self.root, batch_id)
+
+    def _run(self, batch_id, output):
+        with open(os.path.join(self._dir(batch_id), "input.jsonl"), encoding="utf-8") as src, \
+                open(output + ".tmp", "w", encoding="utf-8") as out:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                record = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"],
+                          "response": None, "error": None}
+                try:
+                    content = self.complete(request["body"])
+                    record["response"] = {"status_code": 200, "body": {
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}]}}
+                except Exception as e:
+                    record["error"] = {"code": type(e).__name__, "message": str(e)}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(output + ".tmp", output)
+
+
+def prepare_batch(processor: MenuProcessor, files: Iterable[str], job_dir: str) -> Dict:
+    """
+    Extract and chunk every menu file and write one request per chunk to
+    <job_dir>/requests.jsonl, with custom_id "<file key>:<chunk index>".
+    Items the line parser resolved are stored in parsed.jsonl under the same
+    kind of id. The manifest maps file keys back to their source files.
+    Requests go to processor.model, a model cascade only applies to interactive runs.
+    """
+    os.makedirs(job_dir, exist_ok=True)
+    manifest = {"model": processor.model, "output_mode": processor.output_mode,
+                "prompt_version": PROMPT_VERSION, "batch_id": None, "files": {}}
+    request_count = 0
+    requests_path = os.path.join(job_dir, REQUESTS_FILE)
+    parsed_path = os.path.join(job_dir, PARSED_FILE)
+    with open(requests_path + ".tmp", "w", encoding="utf-8") as out, \
+            open(parsed_path + ".tmp", "w", encoding="utf-8") as parsed_out:
+        for path in files:
+            key = _file_key(path, manifest["files"])
+            chunks = 0
+            # Items a chunk's overlap repeats from the previous chunk, by chunk index
+            overlaps = {}
+            for work in processor.iter_batch_requests(path, os.path.basename(path)):
+                if "items" in work:
+                    parsed_out.write(json.dumps({"custom_id": f"{key}:{chunks}", "items": work["items"]},
+                                                ensure_ascii=False) + "\n")
+                    chunks += 1
+                    continue
+                request_count += 1
+                if request_count > MAX_BATCH_REQUESTS:
+                    raise ValueError(f"More than {MAX_BATCH_REQUESTS} chunks, split the files over several jobs")
+                out.write(json.dumps({"custom_id": f"{key}:{chunks}", "method": "POST",
+                                      "url": BATCH_ENDPOINT, "body": work["body"]}, ensure_ascii=False) + "\n")
+                if work["overlap_items"]:
+                    overlaps[str(chunks)] = work["overlap_items"]
+                chunks += 1
+            manifest["files"][key] = {"path": os.path.abspath(path), "chunks": chunks, "overlaps": overlaps}
+    os.replace(requests_path + ".tmp", requests_path)
+    os.replace(parsed_path + ".tmp", parsed_path)
+    _write_manifest(job_dir, manifest)
+    return manifest
+
+
+def submit_batch(backend: BatchBackend, job_dir: str) -> str:
+    manifest = _read_manifest(job_dir)
+    manifest["batch_id"] = backend.submit(os.path.join(job_dir, REQUESTS_FILE))
+    _write_manifest(job_dir, manifest)
+    return manifest["batch_id"]
+
+
+def wait_for_batch(backend: BatchBackend, job_dir: str, poll_interval: float = 60,
+                   timeout: Optional[float] = None) -> str:
+    """Poll until the batch reaches a final state and return that state"""
+    batch_id = _read_manifest(job_dir)["batch_id"]
+    if not batch_id:
+        raise ValueError(f"Batch job {job_dir} has not been submitted")
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        state = backend.status(batch_id)
+        if state in FINAL_STATES:
+            return state
+        if deadline and time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch {batch_id} still {state} after {timeout}s")
+        time.sleep(poll_interval)
+
+
+def collect_results(processor: MenuProcessor, backend: BatchBackend,
+                    job_dir: str) -> Tuple[Dict[str, List[Dict]], Dict[str, List[Dict]]]:
+    """
+    Download the results and map them back to files and chunks. Responses
+    are parsed in the output mode the requests were prepared with, the
+    processor has to use the model and prompt version of the job.
+    Returns (items per file key in chunk order, errors per file key).
+    """
+    manifest = _read_manifest(job_dir)
+    if manifest["model"] != processor.model:
+        raise ValueError(f"Batch job {job_dir} was prepared for {manifest['model']}, not {processor.model}")
+    if manifest["prompt_version"] != PROMPT_VERSION:
+        raise ValueError(f"Batch job {job_dir} was prepared with prompt version {manifest['prompt_version']}, "
+                         f"this is version {PROMPT_VERSION}, prepare it again")
+    results_path = os.path.join(job_dir, RESULTS_FILE)
+    backend.download_results(manifest["batch_id"], results_path)
+
+    chunk_items: Dict[str, Dict[int, List[Dict]]] = {key: {} for key in manifest["files"]}
+    parsed_chunks: Dict[str, set] = {key: set() for key in manifest["files"]}
+    errors: Dict[str, List[Dict]] = {key: [] for key in manifest["files"]}
+    parsed_path = os.path.join(job_dir, PARSED_FILE)
+    if os.path.exists(parsed_path):
+        with open(parsed_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    key, _, index = record["custom_id"].rpartition(":")
+                    if key in chunk_items:
+                        chunk_items[key][int(index)] = record["items"]
+                        parsed_chunks[key].add(int(index))
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            key, _, index = record["custom_id"].rpartition(":")
+            if key not in chunk_items:
+                continue
+            try:
+                chunk_items[key][int(index)] = processor.parse_batch_response(_response_text(record),
+                                                                              manifest["output_mode"])
+            except Exception as e:
+                errors[key].append({"chunk": int(index), "error": str(e)})
+
+    items = {}
+    for key, by_index in chunk_items.items():
+        answered = set(by_index) | {error["chunk"] for error in errors[key]}
+        for index in range(manifest["files"][key]["chunks"]):
+            if index not in answered:
+                errors[key].append({"chunk": index, "error": "No result in the batch output"})
+        errors[key].sort(key=lambda error: error["chunk"])
+        # Drop what overlapping text chunks extracted twice, parsed lists are not part of the overlap
+        merger = ChunkItemMerger()
+        overlaps = manifest["files"][key].get("overlaps", {})
+        items[key] = []
+        for index in sorted(by_index):
+            if index in parsed_chunks[key]:
+                items[key].extend(by_index[index])
+            else:
+                items[key].extend(merger.merge(index, by_index[index], overlaps.get(str(index), 0)))
+    return items, errors
+
+
+def write_csvs(processor: MenuProcessor, items: Dict[str, List[Dict]], template_path: str,
+               out_dir: str) -> List[str]:
+    """One CSV per menu file, named after its file key"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for key, file_items in items.items():
+        path = os.path.join(out_dir, f"{key}.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(processor.generate_csv(file_items, template_path))
+        paths.append(path)
+    return paths
+
+
+def _response_text(record):
+    if record.get("error"):
+        raise RuntimeError(f"Batch request failed: {record['error']}")
+    response = record.get("response") or {}
+    if response.get("status_code") != 200:
+        raise RuntimeError(f"Batch request failed with status {response.get('status_code')}: {response.get('body')}")
+    message = response["body"]["choices"][0]["message"]
+    # Function calling returns the items as call arguments
+    if message.get("tool_calls"):
+        return message["tool_calls"][0]["function"]["arguments"]
+    return message.get("content") or ""
+
+
+def _file_key(path, existing):
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", os.path.splitext(os.path.basename(path))[0]) or "menu"
+    key = stem
+    suffix = 2
+    while key in existing:
+        key = f"{stem}_{suffix}"
+        suffix += 1
+    return key
+
+
+def _read_manifest(job_dir):
+    with open(os.path.join(job_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(job_dir, manifest):
+    path = os.path.join(job_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _make_backend(name, processor, job_dir):
+    if name == "openai":
+        if not processor.capabilities.batch:
+            raise ValueError(f"The LLM client has no batch API for {processor.model}, use --backend local")
+        return OpenAIBatchBackend()
+    # The local backend answers every request with the interactive client, created on the first request
+    def complete(body):
+        params = {k: v for k, v in body.items() if k not in ("model", "messages")}
+        return get_shared_llm_client().generate_text(prompt=body["messages"][0]["content"], model=body["model"],
+                                                     **params)
+    return LocalBatchBackend(os.path.join(job_dir, "local_backend"), complete)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["prepare", "submit", "wait", "collect", "run"])
+    parser.add_argument("job_dir")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--backend", choices=["openai", "local"], default="openai")
+    parser.add_argument("--model", default="gpt-4")
+    parser.add_argument("--poll-interval", type=float, default=60)
+    parser.add_argument("--template", default="items_empty.csv")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    if args.command in ("prepare", "run") and not args.files:
+        parser.error("menu files are required")
+    if args.command in ("collect", "run") and not args.out:
+        parser.error("--out is required")
+
+    processor = MenuProcessor(model=args.model, api_key=os.getenv("API") or OFFLINE_API_KEY, shared_client=False)
+    # Only the commands that talk to the batch service need the backend and its API key
+    backend = _make_backend(args.backend, processor, args.job_dir) if args.command != "prepare" else None
+
+    if args.command in ("prepare", "run"):
+        manifest = prepare_batch(processor, args.files, args.job_dir)
+        print(f"{sum(f['chunks'] for f in manifest['files'].values())} chunks for {len(manifest['files'])} files")
+    if args.command in ("submit", "run"):
+        print(f"Submitted batch {submit_batch(backend, args.job_dir)}")
+    if args.command in ("wait", "run"):
+        state = wait_for_batch(backend, args.job_dir, args.poll_interval)
+        print(f"Batch {state}")
+        if state != "completed":
+            raise SystemExit(1)
+    if args.command in ("collect", "run"):
+        items, errors = collect_results(processor, backend, args.job_dir)
+        for path in write_csvs(processor, items, args.template, args.out):
+            print(f"Wrote {path}")
+        for key, file_errors in errors.items():
+            for error in file_errors:
+                print(f"Warning: {key} chunk {error['chunk'] + 1}: {error['error']}")
+
+
+if __name__ == "__main__":
+    main()
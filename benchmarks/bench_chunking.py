@@ -0,0 +1,64 @@
+"""
+LLM calls and input tokens per menu: fixed 2000-character slices vs token-budget chunks.
+
+Usage:
+    python benchmarks/bench_chunking.py [menu.txt ...] [--model gpt-4 --model gpt-4o ...]
+
+Without files a synthetic menu with sections, descriptions and multi-size drinks is used.
+No LLM is called, MenuProcessor only builds the prompts.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from chunking import iter_menu_chunks
+from menu_processor import MenuProcessor
+from token_budget import chunk_budget, get_token_counter
+
+
+def synthetic_menu(sections=12, items=40):
+    lines = []
+    for section in range(sections):
+        lines.append(f"SECTION {chr(65 + section % 26)}")
+        for item in range(items):
+            lines.append(f"Gericht {section}-{item} nach Art des Hauses {item % 20 + 4},90 €")
+            if item % 3 == 0:
+                lines.append("mit Salat, Brot und hausgemachter Sauce")
+        lines.append(f"Cola 0,33l 2,50 0,5l 3,90")
+    return "\n".join(lines)
+
+
+def fixed_chunks(text, size=2000):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--model", action="append", dest="models")
+    args = parser.parse_args()
+    models = args.models or ["gpt-4", "gpt-4-turbo", "gpt-4o"]
+
+    inputs = [(os.path.basename(p), open(p, encoding="utf-8").read()) for p in args.files] or [("synthetic", synthetic_menu())]
+    # Prompt without menu text, the output mode only changes one line of it
+    processor = MenuProcessor.__new__(MenuProcessor)
+    processor.output_mode = "text"
+    prompt = processor._build_prompt("")
+
+    for name, text in inputs:
+        print(f"{name} ({len(text)} chars)")
+        for model in models:
+            count = get_token_counter(model)
+            prompt_tokens = count(prompt)
+            for label, chunks in (
+                ("fixed 2000", fixed_chunks(text)),
+                ("budget", list(iter_menu_chunks([text], chunk_budget(model, prompt_tokens), count))),
+            ):
+                tokens = sum(prompt_tokens + count(c) for c in chunks)
+                print(f"  {model:12} {label:10} {len(chunks):4} calls  {tokens:8} input tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Throughput and peak memory of the streaming DOCX extractor vs the python-docx object model.
+
+Usage:
+    python benchmarks/bench_docx.py [file.docx ...]
+
+Without arguments a synthetic menu with paragraphs and tables is generated.
+"""
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import docx
+
+from docx_stream import iter_docx_sections
+
+
+def python_docx_text(file_bytes):
+    """The previous extractor: python-docx object model, paragraphs only"""
+    with io.BytesIO(file_bytes) as f:
+        doc = docx.Document(f)
+        return "\n".join(para.text for para in doc.paragraphs).strip()
+
+
+def streaming_text(file_bytes):
+    return "\n".join(text for _, text in iter_docx_sections(file_bytes)).strip()
+
+
+def synthetic_menu(items=5000):
+    doc = docx.Document()
+    for section in range(items // 100):
+        doc.add_heading(f"Section {section}", level=2)
+        table = doc.add_table(rows=50, cols=2)
+        for row in range(50):
+            table.cell(row, 0).text = f"Item {section}-{row} mit Beilage"
+            table.cell(row, 1).text = f"{row % 20 + 1},50 €"
+        for row in range(50):
+            doc.add_paragraph(f"Gericht {section}-{row}\t{row % 15 + 3},90 €")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def measure(fn, file_bytes, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = fn(file_bytes)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(file_bytes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(text)
+
+
+def main(paths):
+    inputs = [(os.path.basename(p), open(p, "rb").read()) for p in paths] or [("synthetic", synthetic_menu())]
+    for name, file_bytes in inputs:
+        size_mb = len(file_bytes) / 1e6
+        print(f"{name} ({size_mb:.2f} MB)")
+        for label, fn in (("python-docx", python_docx_text), ("streaming", streaming_text)):
+            seconds, peak, chars = measure(fn, file_bytes)
+            print(f"  {label:12} {seconds:7.3f}s  {size_mb / seconds:7.2f} MB/s  "
+                  f"peak {peak / 1e6:7.1f} MB  {chars} chars")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,66 @@
+"""
+Per-image OCR latency of the pytesseract (subprocess) and tesserocr (in-process pool) engines.
+
+Usage:
+    python benchmarks/bench_ocr_engines.py [--repeat N] [--threads N] image [image ...]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PIL import Image
+
+import extract_text
+from ocr_preprocess import preprocess_for_ocr
+
+
+def run(engine, images, repeat, threads):
+    def ocr_one(img):
+        start = time.perf_counter()
+        engine.image_to_string(img)
+        return time.perf_counter() - start
+
+    # Warm-up call so one-off model loading is reported separately
+    start = time.perf_counter()
+    engine.image_to_string(images[0])
+    warmup = time.perf_counter() - start
+
+    work = images * repeat
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(ocr_one, work))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    p90 = latencies[int(0.9 * (len(latencies) - 1))]
+    print(f"{engine.name:12} warm-up {warmup:6.3f}s  median {statistics.median(latencies):6.3f}s  "
+          f"p90 {p90:6.3f}s  throughput {len(work) / wall:6.2f} img/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    images = [preprocess_for_ocr(Image.open(path)) for path in args.images]
+
+    engines = [extract_text.PytesseractEngine()]
+    if extract_text.TESSEROCR_AVAILABLE:
+        engines.append(extract_text.TesserocrEngine(pool_size=args.threads))
+    else:
+        print("tesserocr is not installed, only benchmarking pytesseract")
+
+    for engine in engines:
+        run(engine, images, args.repeat, args.threads)
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
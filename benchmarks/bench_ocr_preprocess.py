@@ -0,0 +1,87 @@
+"""
+Compare OCR time and accuracy with and without the preprocessing pipeline.
+
+Usage:
+    python benchmarks/bench_ocr_preprocess.py menu.jpg scan.pdf ...
+
+If a ground-truth file named like the input plus ".txt" exists
+(e.g. menu.jpg.txt), the similarity of the OCR output to it is reported.
+"""
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import fitz
+import pytesseract
+from PIL import Image, ImageSequence
+
+import extract_text  # noqa: F401  (sets the tesseract path)
+from ocr_preprocess import OCR_DPI, preprocess_for_ocr
+
+
+def load_pages(path):
+    """Yield (label, raw_image, preprocessed_image) for every page of a file"""
+    if path.lower().endswith(".pdf"):
+        doc = fitz.open(path)
+        for page in doc:
+            # Old path: default 72 dpi RGB pixmap
+            pix = page.get_pixmap()
+            raw = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            pix = page.get_pixmap(dpi=OCR_DPI, colorspace=fitz.csGRAY)
+            new = Image.frombytes("L", [pix.width, pix.height], pix.samples)
+            yield f"page {page.number + 1}", raw, (new, OCR_DPI)
+        doc.close()
+    else:
+        img = Image.open(path)
+        for index, frame in enumerate(ImageSequence.Iterator(img)):
+            frame = frame.convert("RGB")
+            yield f"frame {index + 1}", frame, (frame, None)
+
+
+def ocr(img):
+    start = time.perf_counter()
+    text = pytesseract.image_to_string(img, lang="eng")
+    return text, time.perf_counter() - start
+
+
+def similarity(text, truth):
+    if truth is None:
+        return None
+    return difflib.SequenceMatcher(None, " ".join(text.split()), " ".join(truth.split())).ratio()
+
+
+def main(paths):
+    totals = {"raw": 0.0, "pre": 0.0, "prep": 0.0}
+    print(f"{'file':30} {'page':8} {'raw s':>7} {'pre s':>7} {'prep s':>7} {'raw acc':>8} {'pre acc':>8}")
+    for path in paths:
+        truth_path = path + ".txt"
+        truth = open(truth_path, encoding="utf-8").read() if os.path.exists(truth_path) else None
+        for label, raw, (new, dpi) in load_pages(path):
+            raw_text, raw_time = ocr(raw)
+
+            start = time.perf_counter()
+            prepared = preprocess_for_ocr(new, dpi=dpi)
+            prep_time = time.perf_counter() - start
+            pre_text, pre_time = ocr(prepared)
+
+            totals["raw"] += raw_time
+            totals["pre"] += pre_time
+            totals["prep"] += prep_time
+
+            raw_acc = similarity(raw_text, truth)
+            pre_acc = similarity(pre_text, truth)
+            print(f"{os.path.basename(path)[:30]:30} {label:8} {raw_time:7.2f} {pre_time:7.2f} {prep_time:7.2f} "
+                  f"{'-' if raw_acc is None else f'{raw_acc:.3f}':>8} {'-' if pre_acc is None else f'{pre_acc:.3f}':>8}")
+
+    print(f"\nTotal OCR time: raw {totals['raw']:.2f}s, preprocessed {totals['pre']:.2f}s "
+          f"(+{totals['prep']:.2f}s preprocessing)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1:])
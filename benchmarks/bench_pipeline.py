@@ -0,0 +1,130 @@
+"""
+Full-pipeline throughput and latency of MenuProcessor against recorded LLM responses.
+
+Usage:
+    # Record real responses once (needs the API key and network)
+    python benchmarks/bench_pipeline.py record recording.jsonl menu.pdf [menu.docx ...]
+    # Or synthesize a recording offline, one item per priced line
+    python benchmarks/bench_pipeline.py synthesize recording.jsonl [menu.txt ...]
+    # Replay it, without network, at several concurrency levels
+    python benchmarks/bench_pipeline.py replay recording.jsonl [menu.pdf ...] \\
+        [--concurrency 1 --concurrency 4] [--latency 2.0 --jitter 0.5 --error-rate 0.05] [--stream]
+
+Without files the synthetic menu of bench_chunking.py is used. Replays are
+deterministic for a given --seed, so runs can be compared across commits.
+Record and replay with the same --model and settings, the prompts have to match.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_chunking import synthetic_menu
+from llm_clients import BaseLLMClient, ClientCapabilities
+from llm_clients.replay_client import RecordingClient
+from menu_processor import MenuProcessor
+from token_budget import model_limits
+
+PRICED_LINE_PATTERN = re.compile(r"^(.*?)\s+(\d{1,4}),(\d{2})\s*€?$")
+
+
+class SyntheticClient(BaseLLMClient):
+    """Answers menu prompts with one item per line ending in a price, no LLM involved"""
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        menu_text = prompt.split('"""')[1]
+        items = []
+        for line in menu_text.splitlines():
+            match = PRICED_LINE_PATTERN.match(line.strip())
+            if match:
+                items.append({"name": match.group(1)[:20], "quantity": 1,
+                              "price": int(match.group(2)) * 100 + int(match.group(3)), "warengruppe": "Speisen",
+                              "hauptgruppe": "KÜCHE", "steuersatz": 7, "ordergruppe": "KÜCHE WARM", "ausser_haus": 1})
+        return json.dumps(items, ensure_ascii=False)
+
+    def get_capabilities(self, model: str) -> ClientCapabilities:
+        context, max_output = model_limits(model)
+        return ClientCapabilities(max_context_tokens=context, max_output_tokens=max_output,
+                                  streaming=False, batch=False)
+
+
+def input_files(paths):
+    if paths:
+        return paths
+    path = os.path.join(tempfile.gettempdir(), "bench_pipeline_menu.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(synthetic_menu())
+    return [path]
+
+
+def run(processor, files, stream):
+    """Seconds, items, chunks, failed chunks and time to the first LLM item per file"""
+    results = []
+    for path in files:
+        start = time.perf_counter()
+        items = list(processor.iter_menu_items(path, os.path.basename(path), stream=stream))
+        results.append({"seconds": time.perf_counter() - start, "items": len(items),
+                        "chunks": processor.last_report["chunks"], "errors": len(processor.last_errors),
+                        "first_item": processor.last_report["time_to_first_llm_item"]})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["record", "synthesize", "replay"])
+    parser.add_argument("recording")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--model", default="gpt-4")
+    parser.add_argument("--concurrency", type=int, action="append")
+    parser.add_argument("--latency", type=float, help="seconds per call (default: as recorded)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+    files = input_files(args.files)
+    settings = dict(model=args.model, cache=None)
+
+    if args.command == "record":
+        processor = MenuProcessor(llm_options={"record_path": args.recording}, **settings)
+        results = run(processor, files, args.stream)
+        print(f"recorded {processor.llm.recorded} responses for {sum(r['items'] for r in results)} items")
+        return
+    if args.command == "synthesize":
+        # Same capabilities as the synthetic client: plain text output, the model's limits
+        processor = MenuProcessor(llm_provider="other", **settings)
+        processor.llm = RecordingClient(SyntheticClient(), args.recording)
+        results = run(processor, files, stream=False)
+        print(f"synthesized {processor.llm.recorded} responses for {sum(r['items'] for r in results)} items")
+        return
+
+    print(f"{len(files)} files, model {args.model}, latency {args.latency if args.latency is not None else 'recorded'}"
+          f" ±{args.jitter}s, error rate {args.error_rate:.0%}, {'streaming' if args.stream else 'blocking'}")
+    for concurrency in args.concurrency or [1, 4, 8]:
+        runs = []
+        for _ in range(args.repeat):
+            options = {"path": args.recording, "latency": args.latency, "jitter": args.jitter,
+                       "error_rate": args.error_rate, "seed": args.seed}
+            # A fresh client per run, so every run replays the same latencies and errors
+            processor = MenuProcessor(llm_provider="replay", max_concurrency=concurrency, llm_options=options,
+                                      shared_client=False, **settings)
+            results = run(processor, files, args.stream)
+            runs.append((sum(r["seconds"] for r in results), results, processor.llm.stats()))
+        seconds, results, stats = sorted(runs, key=lambda r: r[0])[len(runs) // 2]
+        items = sum(r["items"] for r in results)
+        first = statistics.median(r["first_item"] for r in results if r["first_item"] is not None) \
+            if any(r["first_item"] is not None for r in results) else float("nan")
+        print(f"  concurrency {concurrency:3}: {seconds:7.2f}s  {items / seconds if seconds else 0:8.1f} items/s"
+              f"  first LLM item {first:6.2f}s  {sum(r['chunks'] for r in results):4} chunks"
+              f"  {sum(r['errors'] for r in results):3} failed  {stats['misses']} unrecorded")
+
+
+if __name__ == "__main__":
+    main()
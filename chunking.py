@@ -0,0 +1,218 @@
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from menu_patterns import PRICE_ONLY_PATTERN, PRICE_PATTERN
+from token_budget import ChunkBudget, estimate_tokens
+
+# Menu text per LLM call when no model budget is given, in tokens (roughly 2000 characters)
+DEFAULT_CHUNK_TOKENS = 500
+
+# A section header arriving when the chunk is this full starts a new chunk
+HEADER_SPLIT_FILL = 0.75
+
+# Overlap repeated from the previous chunk takes at most this share of a chunk's input budget
+MAX_OVERLAP_FILL = 0.25
+
+# Headers are short lines
+MAX_HEADER_CHARS = 40
+MAX_HEADER_WORDS = 5
+
+# Common section names on German and English menus
+SECTION_KEYWORDS = {
+    "vorspeisen", "suppen", "salate", "hauptgerichte", "hauptspeisen", "beilagen", "desserts",
+    "nachspeisen", "nachtisch", "pizza", "pizzen", "pasta", "nudeln", "fisch", "fleisch",
+    "vegetarisch", "kinderkarte", "getränke", "alkoholfreie getränke", "heißgetränke",
+    "warme getränke", "kaffee", "tee", "bier", "biere", "wein", "weine", "weißwein", "rotwein",
+    "spirituosen", "cocktails", "softdrinks", "säfte", "starters", "appetizers", "soups",
+    "salads", "mains", "main courses", "sides", "drinks", "beverages", "hot drinks",
+    "wine", "wines", "beer", "beers", "spirits", "kids menu", "specials",
+}
+
+
+def is_section_header(line: str) -> bool:
+    """Heuristic: short line without a price that is a known section name, ALL CAPS or ends with ':'"""
+    stripped = line.strip().lstrip("#").strip()
+    if not stripped or len(stripped) > MAX_HEADER_CHARS or len(stripped.split()) > MAX_HEADER_WORDS:
+        return False
+    if PRICE_PATTERN.search(stripped) or any(c.isdigit() for c in stripped):
+        return False
+    if stripped.rstrip(":").lower() in SECTION_KEYWORDS:
+        return True
+    if stripped.endswith(":") or line.lstrip().startswith("#"):
+        return True
+    letters = [c for c in stripped if c.isalpha()]
+    return len(letters) >= 3 and all(c.isupper() for c in letters)
+
+
+def iter_menu_chunks(texts: Iterable[str], budget: Optional[ChunkBudget] = None,
+                     count_tokens: Callable[[str], int] = estimate_tokens,
+                     overlap_lines: int = 0) -> Iterator["MenuChunk"]:
+    """
+    Split streamed menu text into chunks that fit the token budget.
+
+    Chunks are only cut at line boundaries. A price-only line and lowercase
+    continuation lines stay with the line before them, so an item is never
+    separated from its price or description. Section headers preferably start
+    a new chunk, and every chunk starts with the header of the section it is in.
+    Every price in a chunk is counted as one item of expected output.
+
+    When a section is split because the chunk is full, the next chunk repeats
+    the last overlap_lines lines of the previous one (whole units, within
+    MAX_OVERLAP_FILL of the budget), so an item the grouping cut apart is
+    complete in one of them. Every chunk reports how many items its overlap
+    repeats (overlap_items, 0 when it has none), items extracted twice from
+    those lines are removed afterwards, see item_merge.ChunkItemMerger.
+    """
+    if budget is None:
+        budget = ChunkBudget(input_tokens=DEFAULT_CHUNK_TOKENS, total_tokens=10 ** 9, output_tokens=10 ** 9)
+    chunk = _Chunk(budget)
+    header: Optional[str] = None
+    header_tokens = 0
+
+    for unit, unit_is_header in _iter_units(texts):
+        unit_text = "\n".join(unit)
+        tokens = count_tokens(unit_text)
+
+        if unit_is_header:
+            # Start the new section in a fresh chunk when this one is nearly full
+            if chunk.has_items and chunk.fill(tokens, 0) > HEADER_SPLIT_FILL:
+                yield chunk.text()
+                chunk = _Chunk(budget)
+            elif not chunk.has_items:
+                # Consecutive headers replace each other at the top of a chunk
+                chunk = _Chunk(budget)
+            header, header_tokens = unit_text, tokens
+            chunk.add(unit_text, tokens, 0, is_item=False)
+            continue
+
+        # A single oversized unit is split at word boundaries as a last resort
+        max_piece_tokens = budget.input_tokens - header_tokens
+        for piece in _split_oversized(unit_text, tokens, max_piece_tokens, count_tokens):
+            piece_tokens = tokens if piece is unit_text else count_tokens(piece)
+            output = budget.output_tokens_per_item * max(1, len(PRICE_PATTERN.findall(piece)))
+            if chunk.has_items and not chunk.fits(piece_tokens, output):
+                yield chunk.text()
+                previous = chunk
+                chunk = _Chunk(budget)
+                # Carry the section header into the next chunk
+                if header:
+                    chunk.add(header, header_tokens, 0, is_item=False)
+                overlap = previous.tail(overlap_lines, budget.input_tokens * MAX_OVERLAP_FILL)
+                for text, text_tokens, text_output in overlap:
+                    chunk.add(text, text_tokens, text_output, is_item=False)
+                    chunk.overlap_items += max(1, len(PRICE_PATTERN.findall(text)))
+                if overlap and not chunk.fits(piece_tokens, output):
+                    # No room for the overlap next to this unit
+                    chunk = _Chunk(budget)
+                    if header:
+                        chunk.add(header, header_tokens, 0, is_item=False)
+            chunk.add(piece, piece_tokens, output, is_item=True)
+
+    if chunk.has_items:
+        yield chunk.text()
+
+
+class MenuChunk(str):
+    """Text of a chunk, overlap_items is the number of items it repeats from the previous chunk"""
+
+    def __new__(cls, text: str, overlap_items: int = 0):
+        chunk = super().__new__(cls, text)
+        chunk.overlap_items = overlap_items
+        return chunk
+
+
+class _Chunk:
+    """Lines of the chunk being built with their input and expected output tokens"""
+
+    def __init__(self, budget: ChunkBudget):
+        self.budget = budget
+        self.lines: List[str] = []
+        # (text, input tokens, output tokens) of the item units, for the overlap
+        self.units: List[Tuple[str, int, int]] = []
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.has_items = False
+        # Items of the overlap units repeated from the previous chunk
+        self.overlap_items = 0
+
+    def add(self, text, input_tokens, output_tokens, is_item):
+        self.lines.append(text)
+        # +1 for the newline joining the lines
+        self.input_tokens += input_tokens + 1
+        self.output_tokens += output_tokens
+        self.has_items = self.has_items or is_item
+        if output_tokens:
+            self.units.append((text, input_tokens, output_tokens))
+
+    def tail(self, max_lines, max_tokens):
+        """Last item units covering up to max_lines lines and max_tokens input tokens"""
+        tail: List[Tuple[str, int, int]] = []
+        lines = tokens = 0
+        for unit in reversed(self.units):
+            if lines >= max_lines or tokens + unit[1] > max_tokens:
+                break
+            tail.append(unit)
+            lines += unit[0].count("\n") + 1
+            tokens += unit[1]
+        return tail[::-1]
+
+    def fits(self, input_tokens, output_tokens):
+        return self.fill(input_tokens, output_tokens) <= 1
+
+    def fill(self, input_tokens, output_tokens):
+        """Fraction of the tightest limit used after adding a unit"""
+        new_input = self.input_tokens + input_tokens
+        new_output = self.output_tokens + output_tokens
+        return max(new_input / self.budget.input_tokens,
+                   (new_input + new_output) / self.budget.total_tokens,
+                   new_output / self.budget.output_tokens)
+
+    def text(self):
+        return MenuChunk("\n".join(self.lines), self.overlap_items)
+
+
+def _iter_units(texts):
+    """
+    Group lines into units that must not be split, yielding (lines, is_header).
+    A header candidate directly followed by a price-only line is an item name.
+    """
+    unit: List[str] = []
+    unit_is_header = False
+    for text in texts:
+        for raw_line in text.splitlines():
+            line = raw_line.strip()
+            if not line:
+                continue
+            if unit and _binds_to_previous(line, unit_is_header):
+                unit.append(line)
+                unit_is_header = False
+                continue
+            if unit:
+                yield unit, unit_is_header
+            unit = [line]
+            unit_is_header = is_section_header(line)
+    if unit:
+        yield unit, unit_is_header
+
+
+def _binds_to_previous(line, previous_is_header):
+    if PRICE_ONLY_PATTERN.match(line):
+        return True
+    # Item descriptions continue in lowercase ("mit Tomaten und Basilikum")
+    return not previous_is_header and line[0].islower()
+
+
+def _split_oversized(text, tokens, max_tokens, count_tokens):
+    max_tokens = max(max_tokens, 1)
+    if tokens <= max_tokens:
+        return [text]
+    pieces, current = [], ""
+    for word in text.split(" "):
+        candidate = f"{current} {word}" if current else word
+        if current and count_tokens(candidate) > max_tokens:
+            pieces.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
@@ -0,0 +1,168 @@
+import zipfile
+from io import BytesIO
+from typing import Iterator, Optional, Tuple
+from xml.parsers import expat
+
+# Expat reports namespaced tags as "<namespace uri> <local name>"
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main "
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006 "
+
+# Tags handled by the parser
+PARAGRAPH = W_NS + "p"
+TEXT = W_NS + "t"
+TAB = W_NS + "tab"
+BREAKS = (W_NS + "br", W_NS + "cr")
+HYPHEN = W_NS + "noBreakHyphen"
+ROW = W_NS + "tr"
+CELL = W_NS + "tc"
+TEXT_BOX = W_NS + "txbxContent"
+SECTION = W_NS + "sectPr"
+
+# Alternate renderings (e.g. the VML copy of a text box) would duplicate content
+FALLBACK = MC_NS + "Fallback"
+
+SECTION_BREAK = None
+
+# Compressed XML is decompressed and parsed in blocks of this size
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def _open_document_xml(source):
+    archive = zipfile.ZipFile(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    return archive, archive.open("word/document.xml")
+
+
+def iter_docx_lines(source) -> Iterator[Optional[str]]:
+    """
+    Stream the text of a DOCX file in document order without building an object model.
+
+    Paragraphs are yielded as lines, table rows as tab-separated cell text and
+    text-box paragraphs where the text box is anchored. SECTION_BREAK (None)
+    is yielded at the end of every section.
+    """
+    archive, stream = _open_document_xml(source)
+    try:
+        yield from _parse(stream)
+    finally:
+        stream.close()
+        archive.close()
+
+
+def iter_docx_sections(source) -> Iterator[Tuple[int, str]]:
+    """Group streamed DOCX lines into (section_index, text) pairs"""
+    section = 0
+    lines = []
+    for line in iter_docx_lines(source):
+        if line is SECTION_BREAK:
+            yield section, "\n".join(lines).strip()
+            section += 1
+            lines = []
+        else:
+            lines.append(line)
+    if lines:
+        yield section, "\n".join(lines).strip()
+
+
+def _parse(stream):
+    parser = _DocxTextParser()
+    while True:
+        block = stream.read(READ_BLOCK_SIZE)
+        parser.feed(block, final=not block)
+        # Hand out whatever was completed in this block before reading the next one
+        if parser.output:
+            yield from parser.output
+            parser.output = []
+        if not block:
+            return
+
+
+class _DocxTextParser:
+    """
+    Expat callbacks that turn WordprocessingML into lines. No element tree is built.
+
+    Every container collects the lines of its paragraphs. Body and text-box
+    lines go to the output, cell lines are joined into their table row.
+    """
+
+    def __init__(self):
+        self.output = []
+        self._containers = [[]]
+        self._paragraphs = []
+        self._rows = []
+        self._skip = 0
+        self._in_text = False
+        self._section_ended = False
+
+        self._parser = expat.ParserCreate(namespace_separator=" ")
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._characters
+
+    def feed(self, data, final=False):
+        self._parser.Parse(data, final)
+
+    def _start(self, tag, attrs):
+        if tag == FALLBACK:
+            self._skip += 1
+        elif self._skip:
+            return
+        elif tag == TEXT:
+            self._in_text = True
+        elif tag == PARAGRAPH:
+            self._paragraphs.append([])
+        elif tag == ROW:
+            self._rows.append([])
+        elif tag == CELL or tag == TEXT_BOX:
+            self._containers.append([])
+
+    def _characters(self, data):
+        if self._in_text and self._paragraphs:
+            self._paragraphs[-1].append(data)
+
+    def _end(self, tag):
+        if tag == FALLBACK:
+            self._skip -= 1
+            return
+        if self._skip:
+            return
+
+        if tag == TEXT:
+            self._in_text = False
+            return
+        elif tag == TAB:
+            if self._paragraphs:
+                self._paragraphs[-1].append("\t")
+            return
+        elif tag in BREAKS:
+            if self._paragraphs:
+                self._paragraphs[-1].append("\n")
+            return
+        elif tag == HYPHEN:
+            if self._paragraphs:
+                self._paragraphs[-1].append("-")
+            return
+        elif tag == SECTION:
+            # In a paragraph's properties it ends that section, at body level it ends the last one
+            self._section_ended = True
+        elif tag == PARAGRAPH:
+            self._containers[-1].append("".join(self._paragraphs.pop()))
+        elif tag == TEXT_BOX:
+            lines = self._containers.pop()
+            self._containers[-1].extend(lines)
+        elif tag == CELL:
+            lines = self._containers.pop()
+            if self._rows:
+                self._rows[-1].append(" ".join(l.replace("\t", " ").strip() for l in lines if l.strip()))
+        elif tag == ROW:
+            self._containers[-1].append("\t".join(self._rows.pop()))
+        else:
+            return
+
+        # Top-level lines are complete once no paragraph is open
+        if len(self._containers) == 1 and not self._paragraphs:
+            self.output.extend(self._containers[0])
+            self._containers[0] = []
+            if self._section_ended:
+                self.output.append(SECTION_BREAK)
+                self._section_ended = False
@@ -1,106 +1,649 @@
 import fitz 
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageSequence, UnidentifiedImageError
 from io import BytesIO
-import docx
+import io
+import mmap
+import shutil
+import tempfile
 import os
+import logging
+import queue
+import threading
+import time
+import zipfile
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from pillow_heif import register_heif_opener
+from ocr_preprocess import OCR_DPI, preprocess_for_ocr
+from pdf_layout import extract_page_layout_text
+from docx_stream import iter_docx_sections
+
+# Optional in-process tesseract bindings, pytesseract (one subprocess per image) is the fallback
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
 
 # defining location of tesseract installation
 pytesseract.pytesseract.tesseract_cmd = r'C:\\Program Files\\Tesseract-OCR\\tesseract.exe'
 
+# Let PIL open HEIC/HEIF images
+register_heif_opener()
+
+logger = logging.getLogger(__name__)
+
+# Number of OCR worker processes for scanned PDFs (0 = one per CPU)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+
+# OCR backend: "auto" (tesserocr if installed), "tesserocr" or "pytesseract"
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+OCR_LANG = "eng"
+
+# Maximum number of long-lived tesseract handles per process
+OCR_ENGINE_POOL_SIZE = int(os.getenv("OCR_ENGINE_POOL_SIZE", "0")) or (os.cpu_count() or 1)
+
+# Process pools per worker count, a pool other sessions may be submitting to is never shut down
+_ocr_pools = {}
+_ocr_pool_lock = threading.Lock()
+
+_ocr_engine = None
+_ocr_engine_lock = threading.Lock()
+
+
+# Pages whose text layer is shorter than this are OCR'd instead
+MIN_TEXT_LAYER_CHARS = int(os.getenv("MIN_TEXT_LAYER_CHARS", "20"))
+
+# Pages with less text than this and a large image are treated as scans
+IMAGE_PAGE_TEXT_CHARS = 200
+IMAGE_PAGE_COVERAGE = 0.5
+
+# "layout" rebuilds column reading order from text spans, "raw" keeps content-stream order
+PDF_TEXT_MODE = os.getenv("PDF_TEXT_MODE", "layout")
+
+
+# Content types detected by sniff_format and the extensions that normally carry them
+IMAGE_FORMATS = ("png", "jpeg", "bmp", "tiff")
+EXTENSION_FORMATS = {
+    ".pdf": "pdf",
+    ".png": "png",
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".bmp": "bmp",
+    ".tif": "tiff",
+    ".tiff": "tiff",
+    ".heic": "heic",
+    ".heif": "heic",
+    ".docx": "docx",
+    ".txt": "text",
+}
+
+# ISO-BMFF brands used by HEIC/HEIF files
+HEIF_BRANDS = {b"heic", b"heix", b"hevc", b"hevx", b"heim", b"heis", b"hevm", b"hevs", b"mif1", b"msf1"}
+
+# BMP info header sizes (BITMAPCOREHEADER .. BITMAPV5HEADER)
+BMP_HEADER_SIZES = {12, 16, 40, 52, 56, 64, 108, 124}
+
+# Leading bytes inspected to tell text from binary data
+SNIFF_TEXT_BYTES = 8192
+
+# Uploads larger than this are spilled to a temporary file and extracted from its path
+SPILL_THRESHOLD = int(os.getenv("SPILL_THRESHOLD_MB", "16")) * 1024 * 1024
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised when the input is not a format that text can be extracted from"""
+
+
+class OCRPageResult(NamedTuple):
+    page_index: int
+    text: str
+    seconds: float
+
+
+class PageText(NamedTuple):
+    page_index: int
+    text: str
+    source: str  # "text" for the PDF text layer, "ocr" for tesseract
+    seconds: float
+
+class OCREngine:
+    """OCR backend interface"""
+    name = "base"
+
+    def image_to_string(self, img, lang: str = OCR_LANG) -> str:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract binary once per image"""
+    name = "pytesseract"
+
+    def image_to_string(self, img, lang: str = OCR_LANG) -> str:
+        return pytesseract.image_to_string(img, lang=lang)
+
+
+class TesserocrEngine(OCREngine):
+    """
+    Keeps a pool of long-lived tesseract API handles in this process, so the
+    language model is loaded once per handle instead of once per image.
+    """
+    name = "tesserocr"
+
+    def __init__(self, pool_size: int = OCR_ENGINE_POOL_SIZE, tessdata_path: Optional[str] = None):
+        if not TESSEROCR_AVAILABLE:
+            raise RuntimeError("tesserocr is not installed")
+        self.pool_size = pool_size
+        self.tessdata_path = tessdata_path or _tessdata_path()
+        self._idle = {}  # lang -> LifoQueue of idle handles
+        self._created = {}  # lang -> number of handles created
+        self._lock = threading.Lock()
+
+    def _acquire(self, lang):
+        with self._lock:
+            idle = self._idle.setdefault(lang, queue.LifoQueue())
+            try:
+                return idle.get_nowait()
+            except queue.Empty:
+                pass
+            create = self._created.get(lang, 0) < self.pool_size
+            if create:
+                self._created[lang] = self._created.get(lang, 0) + 1
+        if create:
+            try:
+                kwargs = {"lang": lang}
+                if self.tessdata_path:
+                    kwargs["path"] = self.tessdata_path
+                return tesserocr.PyTessBaseAPI(**kwargs) # type: ignore
+            except Exception:
+                with self._lock:
+                    self._created[lang] -= 1
+                raise
+        # Pool exhausted, wait for a handle to be released
+        return idle.get()
+
+    def image_to_string(self, img, lang: str = OCR_LANG) -> str:
+        api = self._acquire(lang)
+        try:
+            api.SetImage(img)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._idle[lang].put(api)
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                while not idle.empty():
+                    idle.get_nowait().End()
+            self._idle.clear()
+            self._created.clear()
+
+# tessdata lives next to the configured tesseract binary on Windows installs
+def _tessdata_path():
+    if os.getenv("TESSDATA_PREFIX"):
+        return os.getenv("TESSDATA_PREFIX")
+    path = os.path.join(os.path.dirname(pytesseract.pytesseract.tesseract_cmd), "tessdata")
+    return path if os.path.isdir(path) else None
+
+def get_ocr_engine() -> OCREngine:
+    """Process-wide OCR engine, created on first use"""
+    global _ocr_engine
+    with _ocr_engine_lock:
+        if _ocr_engine is None:
+            if OCR_ENGINE in ("auto", "tesserocr") and TESSEROCR_AVAILABLE:
+                _ocr_engine = TesserocrEngine(pool_size=OCR_ENGINE_POOL_SIZE)
+            else:
+                if OCR_ENGINE == "tesserocr":
+                    logger.warning("tesserocr is not installed, falling back to pytesseract")
+                _ocr_engine = PytesseractEngine()
+        return _ocr_engine
+
+# Run OCR through the configured engine, falling back to pytesseract if it fails to start
+def _ocr(img, lang: str = OCR_LANG) -> str:
+    global _ocr_engine
+    engine = get_ocr_engine()
+    try:
+        return engine.image_to_string(img, lang=lang)
+    except RuntimeError as e:
+        if isinstance(engine, PytesseractEngine):
+            raise
+        logger.warning("%s engine failed (%s), falling back to pytesseract", engine.name, e)
+        with _ocr_engine_lock:
+            _ocr_engine = PytesseractEngine()
+        return _ocr_engine.image_to_string(img, lang=lang)
+
 # Extracting text from .txt file
-def extract_text_from_text(file_bytes):
-    return file_bytes.decode("utf-8").strip()
-
-# Extract text from .docx file
-def extract_text_from_docx(file_bytes):
-    with BytesIO(file_bytes) as f:
-        doc = docx.Document(f)
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        return "\n".join(full_text).strip()
+def extract_text_from_text(source):
+    data = _read_all(source)
+    try:
+        return data.decode("utf-8-sig").strip()
+    except UnicodeDecodeError:
+        # Older German menus are often saved as Windows-1252
+        return data.decode("cp1252", errors="replace").strip()
+
+# Detect the file format from its content
+def sniff_format(source) -> Optional[str]:
+    """
+    Identify the format from magic bytes and content signatures.
+    Returns one of "pdf", "png", "jpeg", "bmp", "tiff", "heic", "docx", "text",
+    or None if the content is not recognised.
+    """
+    head = _read_head(source, SNIFF_TEXT_BYTES)
+
+    # PDF readers accept junk before the header, so look a little further in
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith((b"II*\x00", b"MM\x00*")):
+        return "tiff"
+    if head.startswith(b"BM") and len(head) >= 18 and int.from_bytes(head[14:18], "little") in BMP_HEADER_SIZES:
+        return "bmp"
+    if head[4:8] == b"ftyp" and _is_heif(head):
+        return "heic"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx" if _is_docx(source) else None
+    if _looks_like_text(head):
+        return "text"
+    return None
+
+def _is_heif(head):
+    box_size = int.from_bytes(head[:4], "big")
+    # Major brand followed by the list of compatible brands
+    brands = [head[8:12]] + [head[i:i + 4] for i in range(16, min(box_size, len(head)), 4)]
+    return any(brand in HEIF_BRANDS for brand in brands)
+
+def _is_docx(source):
+    try:
+        # Only the central directory is read, not the archive members
+        with zipfile.ZipFile(_as_file(source)) as archive:
+            return "word/document.xml" in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+def _looks_like_text(head):
+    if b"\x00" in head:
+        return False
+    try:
+        # A multi-byte character may be cut at the end of the sample
+        text = head.decode("utf-8-sig", errors="strict") if len(head) < SNIFF_TEXT_BYTES else head[:-4].decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = head.decode("cp1252", errors="replace")
+    printable = sum(1 for c in text if c.isprintable() or c in "\r\n\t")
+    return printable >= 0.95 * len(text)
+
+# Extract text from .docx file (paragraphs, table rows and text boxes, streamed from the XML)
+def extract_text_from_docx(source):
+    return "\n".join(text for _, text in iter_docx_sections(_as_file(source))).strip()
+
+# Extract text from image file (JPG, PNG, BMP, TIFF), one entry per frame
+def iter_image_pages(source) -> Iterator[Tuple[int, str]]:
+    img = Image.open(_as_file(source))
+    for index, frame in enumerate(ImageSequence.Iterator(img)):
+        text = _ocr(preprocess_for_ocr(frame))
+        yield index, text.strip()
 
 # Extract text from image file (JPG, PNG, BMP, TIFF)
-def extract_text_from_image(file_bytes):
-    img = Image.open(BytesIO(file_bytes))
-    text = pytesseract.image_to_string(img, lang="eng")
-    return text.strip()
+def extract_text_from_image(source):
+    return "\n".join(text for _, text in iter_image_pages(source) if text).strip()
 
-# Extract text from HEIC image file
-def extract_text_from_heic(file_bytes):
-    try: 
-        heic_buffer = BytesIO(file_bytes)
-        img = Image.open(heic_buffer)
-        if img.mode != "RGB":
-            img = img.convert('RGB')
-        text = pytesseract.image_to_string(img,lang='eng')
-        return text.strip()
-    except Exception as e:
-        print(f"Error processing HEIC file: {str(e)}")
-        return ""
+# Extract text from HEIC image file, OCR errors are raised like for the other images
+def extract_text_from_heic(source):
+    try:
+        img = Image.open(_as_file(source))
+    except UnidentifiedImageError as e:
+        raise UnsupportedFormatError(f"Unreadable HEIC image: {e}") from e
+    return _ocr(preprocess_for_ocr(img)).strip()
     
 
-# Extract text from PDF documents
-def extract_text_from_pdf(file_bytes):
-    text = ""
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
+# OCR worker process setup, tesseract must not spawn its own threads per worker.
+# Each worker only OCRs one page at a time, so it needs a single engine handle.
+def _init_ocr_worker():
+    global OCR_ENGINE_POOL_SIZE, _ocr_engine
+    # A forked worker inherits the parent's engine, built for the parent's pool size and thread limit
+    _ocr_engine = None
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    OCR_ENGINE_POOL_SIZE = 1
+
+# Shared process pool for a worker count, created on first use
+def _get_ocr_pool(workers):
+    with _ocr_pool_lock:
+        pool = _ocr_pools.get(workers)
+        if pool is None:
+            pool = _ocr_pools[workers] = ProcessPoolExecutor(max_workers=workers, initializer=_init_ocr_worker)
+        return pool
+
+# OCR one rasterized page (runs inside a worker process)
+def _ocr_page(args):
+    page_index, mode, size, samples = args
+    start = time.perf_counter()
+    img = preprocess_for_ocr(Image.frombytes(mode, size, samples), dpi=OCR_DPI)
+    text = _ocr(img)
+    return OCRPageResult(page_index, text, time.perf_counter() - start)
+
+# Render pages lazily so only the in-flight window is held in memory.
+# Pages are rendered in grayscale at OCR_DPI instead of the 72 dpi default.
+def _rasterize_pages(doc, page_indices):
+    for page_num in page_indices:
+        page = doc.load_page(page_num)
+        pix = page.get_pixmap(dpi=OCR_DPI, colorspace=fitz.csGRAY) # type: ignore
+        yield page_num, "L", (pix.width, pix.height), pix.samples # type: ignore
+
+# Like executor.map, but keeps at most `window` tasks in flight and yields in input order
+def _ordered_pool_map(executor, fn, iterable, window):
+    pending = deque()
+    for args in iterable:
+        pending.append(executor.submit(fn, args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def ocr_pdf_pages(source, page_indices: Optional[Iterable[int]] = None,
+                  workers: Optional[int] = None) -> Iterator[OCRPageResult]:
+    """
+    OCR pages of a PDF concurrently in a process pool.
+    Results are yielded in page order, each with its OCR time in seconds.
+    """
+    workers = workers or OCR_WORKERS
+    doc = _open_pdf(source)
+    try:
+        pages = list(range(len(doc))) if page_indices is None else list(page_indices)
+        rasterized = _rasterize_pages(doc, pages)
+
+        if workers <= 1 or len(pages) <= 1:
+            results = map(_ocr_page, rasterized)
+        else:
+            results = _ordered_pool_map(_get_ocr_pool(workers), _ocr_page, rasterized, window=workers * 2)
+
+        for result in results:
+            logger.info("OCR page %d took %.2fs", result.page_index + 1, result.seconds)
+            yield result
+    finally:
+        doc.close()
+
+# Fraction of the page area covered by embedded images
+def _image_coverage(page):
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info(): # type: ignore
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        covered += abs(bbox)
+    return min(covered / page_area, 1.0)
+
+# Decide whether a page's text layer is usable or the page has to be OCR'd
+def _page_needs_ocr(page, page_text):
+    stripped = page_text.strip()
+    if len(stripped) < MIN_TEXT_LAYER_CHARS:
+        return True
+
+    # Broken font encodings produce text layers that are mostly junk characters
+    readable = sum(1 for c in stripped if c.isalnum() or c.isspace())
+    if readable / len(stripped) < 0.5:
+        return True
+
+    # A short text layer on top of a big image is usually just a header over a scan
+    if len(stripped) < IMAGE_PAGE_TEXT_CHARS:
+        return _image_coverage(page) >= IMAGE_PAGE_COVERAGE
+    return False
 
-    # Text-based pdf extraction
-    for page in doc:
-        page_text = page.get_text() # type: ignore
-        if page_text.strip():
-            text += page_text + "\n"
+# Layout-ordered page text, keeping the raw text if the layout pass fails
+def _layout_text(page, raw_text):
+    try:
+        return extract_page_layout_text(page) or raw_text
+    except Exception as e:
+        logger.warning("Layout extraction failed on page %d, using raw text: %s", page.number + 1, e)
+        return raw_text
 
-    # Scanned pdf / image based pdf fallback
-    if not text.strip():
-        text = ""
+def iter_pdf_pages(source, ocr_workers: Optional[int] = None) -> Iterator[PageText]:
+    """
+    Yield every page of a PDF in order as soon as it is ready, using the text
+    layer where it is usable and OCR only for the pages that need it.
+    A quick pass over the text layers decides which pages need OCR. Their
+    OCR is submitted to the process pool before the first page is yielded
+    and runs while text-layer pages are being consumed. PyMuPDF is not
+    thread-safe, so every fitz call (rasterizing included) stays on the
+    calling thread, only pixels and text go to the OCR workers.
+    """
+    doc = _open_pdf(source)
+    pending = deque()
+    try:
+        raw_texts = {}
+        ocr_indices = []
         for page_num in range(len(doc)):
+            start = time.perf_counter()
             page = doc.load_page(page_num)
-            pix = page.get_pixmap() # type: ignore
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples) # type: ignore
-            ocr_text = pytesseract.image_to_string(img, lang="eng")
-            text += ocr_text + "\n"
+            page_text = page.get_text() # type: ignore
+            if _page_needs_ocr(page, page_text):
+                ocr_indices.append(page_num)
+            else:
+                raw_texts[page_num] = (page_text, time.perf_counter() - start)
+
+        workers = ocr_workers or OCR_WORKERS
+        pool = _get_ocr_pool(workers) if ocr_indices else None
+        rasterized = _rasterize_pages(doc, ocr_indices)
+
+        def submit_ocr():
+            # Keep up to two pages per worker queued, rendered only when they are submitted
+            while len(pending) < workers * 2:
+                args = next(rasterized, None)
+                if args is None:
+                    return
+                pending.append(pool.submit(_ocr_page, args)) # type: ignore
+
+        for page_num in range(len(doc)):
+            if pool is not None:
+                submit_ocr()
+            if page_num in raw_texts:
+                page_text, seconds = raw_texts.pop(page_num)
+                if PDF_TEXT_MODE == "layout":
+                    start = time.perf_counter()
+                    page_text = _layout_text(doc.load_page(page_num), page_text)
+                    seconds += time.perf_counter() - start
+                yield PageText(page_num, page_text, "text", seconds)
+            else:
+                result = pending.popleft().result()
+                logger.info("OCR page %d took %.2fs", result.page_index + 1, result.seconds)
+                yield PageText(result.page_index, result.text, "ocr", result.seconds)
+    finally:
+        for future in pending:
+            future.cancel()
+        doc.close()
+
+def extract_pdf_pages(source, ocr_workers: Optional[int] = None) -> List[PageText]:
+    """Extract every page of a PDF. Returns one PageText per page."""
+    return list(iter_pdf_pages(source, ocr_workers=ocr_workers))
+
+# Extract text from PDF documents
+def extract_text_from_pdf(source, ocr_workers: Optional[int] = None):
+    text = ""
+    for page in extract_pdf_pages(source, ocr_workers=ocr_workers):
+        if page.text.strip():
+            text += page.text + "\n"
     return text.strip()
 
-def extract_text(file, filename=None):
-    # Read bytes (if file is BytesIO or stream)
-    if hasattr(file, "read"):
-        file_bytes = file.read()
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only file over a buffer (memoryview, mmap), without copying it"""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+def _is_path(source):
+    return isinstance(source, str)
+
+# File object for libraries that read from files (PIL, zipfile): paths are opened lazily by them
+def _as_file(source):
+    if _is_path(source):
+        return source
+    if isinstance(source, bytes):
+        return BytesIO(source)
+    return _BufferReader(source)
+
+def _open_pdf(source):
+    if _is_path(source):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+def _read_head(source, size):
+    if _is_path(source):
+        with open(source, "rb") as f:
+            return f.read(size)
+    return bytes(source[:size])
+
+def _read_all(source):
+    if _is_path(source):
+        with open(source, "rb") as f:
+            return f.read()
+    return bytes(source)
+
+def _source_size(source):
+    if _is_path(source):
+        return os.path.getsize(source)
+    return len(source)
+
+def normalize_input(file, filename=None):
+    """
+    Turn any supported input into a source the extractors can read without
+    copying it, plus the file extension.
+
+    Accepts filesystem paths, bytes, memoryviews, mmaps and file-like objects.
+    Paths are opened directly by fitz/PIL/zipfile, in-memory BytesIO uploads
+    are viewed through their buffer instead of being read into new bytes.
+    """
+    name = filename
+    if isinstance(file, (str, os.PathLike)):
+        source = os.fspath(file)
+        name = name or source
+    elif isinstance(file, (bytes, memoryview)):
+        source = file
+    elif isinstance(file, (bytearray, mmap.mmap)):
+        source = memoryview(file)
+    elif isinstance(file, BytesIO):
+        source = file.getbuffer()
+    elif hasattr(file, "read"):
+        source = file.read()
 
         # Reset stream position for safety (for reuse later)
         if hasattr(file, "seek"):
             file.seek(0)
-    elif isinstance(file, bytes):
-        file_bytes = file
     else:
-        raise ValueError("Input file must be a file-like object or bytes")
+        raise ValueError("Input file must be a path, a file-like object or bytes")
+
+    if name is None and hasattr(file, "name") and isinstance(file.name, str):
+        name = file.name
 
     # Detect Extension
-    ext = None
-    if filename:
-        ext = os.path.splitext(filename)[1].lower()
-    elif hasattr(file, "name"):
-        ext = os.path.splitext(file.name)[1].lower() # type: ignore
-
-    # Heuristic based on extension or fallback on MIME/type if available
-    if ext in [".pdf"]:
-        return extract_text_from_pdf(file_bytes)
-    elif ext in [".png", ".jpg", ".jpeg", ".bmp", ".tiff"]:
-        return extract_text_from_image(file_bytes)
-    elif ext == ".heic":
-        return extract_text_from_heic(file_bytes)
-    elif ext == ".docx":
-        return extract_text_from_docx(file_bytes)
-    elif ext == ".txt":
-        return extract_text_from_text(file_bytes)
-    else:
-        # Try PDF extraction as fallback for unknown types
+    ext = os.path.splitext(name)[1].lower() if name else None
+    return source, ext
+
+@contextmanager
+def spooled_upload(file, threshold: int = SPILL_THRESHOLD, suffix: str = ""):
+    """
+    Yield the upload unchanged when it is small, or the path of a temporary
+    copy when it is larger than threshold, so large files are extracted from
+    disk instead of being held in memory. The temporary file is removed afterwards.
+    """
+    size = getattr(file, "size", None)
+    if size is None and hasattr(file, "seek"):
+        size = file.seek(0, io.SEEK_END)
+        file.seek(0)
+    if size is None or size <= threshold:
+        yield file
+        return
+
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            file.seek(0)
+            shutil.copyfileobj(file, out, 1024 * 1024)
+        file.seek(0)
+        yield path
+    finally:
         try:
-            return extract_text_from_pdf(file_bytes)
-        except Exception:
-            try:
-                return extract_text_from_image(file_bytes)
-            except Exception:
-                return ""  # Could not extract text
+            os.remove(path)
+        except OSError:
+            pass
+
+# Decide which extractor to use. The content wins over a wrong or missing extension.
+def detect_format(source, ext=None) -> str:
+    if not _source_size(source):
+        return "text"
+    fmt = sniff_format(source)
+    if fmt is None:
+        raise UnsupportedFormatError(f"Unsupported file format{f' ({ext})' if ext else ''}")
+    if ext and EXTENSION_FORMATS.get(ext) != fmt:
+        logger.info("File extension %s does not match its content (%s), using the content", ext, fmt)
+    return fmt
+
+def iter_text_pages(file, filename=None, ocr_workers: Optional[int] = None) -> Iterator[Tuple[int, str, str]]:
+    """
+    Streaming variant of extract_text.
+    Yields (page_index, text, source_kind) as each page, frame or DOCX section
+    becomes ready, so downstream stages can start before extraction finishes.
+    """
+    source, ext = normalize_input(file, filename)
+    fmt = detect_format(source, ext)
+
+    if fmt == "pdf":
+        for page in iter_pdf_pages(source, ocr_workers=ocr_workers):
+            yield page.page_index, page.text, page.source
+    elif fmt in IMAGE_FORMATS:
+        for index, text in iter_image_pages(source):
+            yield index, text, "ocr"
+    elif fmt == "heic":
+        yield 0, extract_text_from_heic(source), "ocr"
+    elif fmt == "docx":
+        for index, text in iter_docx_sections(_as_file(source)):
+            yield index, text, "docx"
+    else:
+        yield 0, extract_text_from_text(source), "text"
+
+def extract_text(file, filename=None):
+    source, ext = normalize_input(file, filename)
+    fmt = detect_format(source, ext)
+
+    if fmt == "pdf":
+        return extract_text_from_pdf(source)
+    elif fmt in IMAGE_FORMATS:
+        return extract_text_from_image(source)
+    elif fmt == "heic":
+        return extract_text_from_heic(source)
+    elif fmt == "docx":
+        return extract_text_from_docx(source)
+    else:
+        return extract_text_from_text(source)
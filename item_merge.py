@@ -0,0 +1,78 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from line_parser import SIZE, normalize_size
+
+SIZE_IN_NAME_PATTERN = re.compile(rf"(?:^|\s){SIZE}(?=\s|$)", re.IGNORECASE)
+NON_WORD_PATTERN = re.compile(r"[^\w]+")
+
+ItemKey = Tuple[str, str, str]
+
+
+def item_key(item: Dict) -> ItemKey:
+    """
+    Normalized (name, size, price) of an item. Case, punctuation and the
+    notation of the size ("0,33 l" or "0.33L") do not matter, so the same
+    menu line extracted twice gets the same key.
+    """
+    name = unicodedata.normalize("NFKC", str(item.get("name") or "")).casefold()
+    size = ""
+    match = SIZE_IN_NAME_PATTERN.search(name)
+    if match:
+        size = normalize_size(match.group(0).strip())[0].casefold()
+        name = name[:match.start()] + " " + name[match.end():]
+    name = " ".join(NON_WORD_PATTERN.sub(" ", name).split())
+    return name, size, _normalize_price(item.get("price"))
+
+
+def _normalize_price(price):
+    try:
+        return str(int(round(float(str(price).replace(",", ".")))))
+    except (TypeError, ValueError):
+        return str(price)
+
+
+class ChunkItemMerger:
+    """
+    Drops the items a chunk repeats from the one before it, which happens for
+    the lines overlapping chunks share. Feed the items of every chunk in chunk
+    order, with the number of items its overlap repeats (chunking.MenuChunk.
+    overlap_items). Only the first that many items of a chunk are compared,
+    against the last that many of the previous chunk, so an item that really
+    is on the menu twice (at the end of one section and the start of the
+    next) is kept. Keys are counted, so a line listed twice within the
+    overlap is only dropped as often as it was seen before. Every item is
+    hashed once, merging is linear in the number of items.
+    """
+
+    def __init__(self):
+        self._chunk: Optional[int] = None
+        self._previous: List[ItemKey] = []
+        self._current: List[ItemKey] = []
+        # Keys at the end of the previous chunk the overlap of the current one may repeat
+        self._repeated: Counter = Counter()
+        self._overlap = 0
+        self.duplicates = 0
+
+    def merge(self, chunk: int, items: Iterable[Dict], overlap: int = 0) -> List[Dict]:
+        """Items of chunk that were not extracted from its overlap with the previous chunk already"""
+        items = list(items)
+        if not items:
+            return []
+        if chunk != self._chunk:
+            self._chunk = chunk
+            self._previous, self._current = self._current, []
+            self._overlap = overlap
+            self._repeated = Counter(self._previous[max(0, len(self._previous) - overlap):]) if overlap else Counter()
+        kept = []
+        for item in items:
+            key = item_key(item)
+            self._current.append(key)
+            if len(self._current) <= self._overlap and self._repeated[key] > 0:
+                self._repeated[key] -= 1
+                self.duplicates += 1
+                continue
+            kept.append(item)
+        return kept
@@ -0,0 +1,87 @@
+import json
+import re
+from typing import Dict, List, Optional
+
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+
+class JSONItemStreamParser:
+    """
+    Incremental parser for a JSON array of objects arriving in pieces.
+
+    feed() returns every element object completed by the new text, so items
+    can be used while the rest of the response is still being generated.
+    The elements of the first array in the text are items, which covers a bare
+    array as well as a wrapper object like {"items": [...]}. Objects without
+    any enclosing array are items too. Text outside JSON (markdown fences,
+    comments before or after the array) is ignored.
+    """
+
+    def __init__(self):
+        self._stack: List[str] = []
+        self._array_level: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+        self._buffer: Optional[List[str]] = None
+        self.items_emitted = 0
+        self.invalid_objects = 0
+
+    def feed(self, text: str) -> List[Dict]:
+        items = []
+        start = 0 if self._buffer is not None else None
+        for pos, char in enumerate(text):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._buffer is None and self._is_element_level():
+                    self._buffer = []
+                    start = pos
+                self._stack.append("{")
+            elif char == "[":
+                if self._array_level is None:
+                    # The first array holds the items, an object around it is only a wrapper
+                    self._array_level = len(self._stack)
+                    self._buffer = None
+                    start = None
+                self._stack.append("[")
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if char == "}" and self._buffer is not None and self._is_element_level():
+                    self._buffer.append(text[start:pos + 1])
+                    item = self._decode("".join(self._buffer))
+                    if item is not None:
+                        items.append(item)
+                    self._buffer = None
+                    start = None
+
+        if self._buffer is not None and start is not None:
+            self._buffer.append(text[start:])
+        self.items_emitted += len(items)
+        return items
+
+    def _is_element_level(self):
+        if self._array_level is None:
+            return not self._stack
+        return len(self._stack) == self._array_level + 1 and self._stack[-1] == "["
+
+    def _decode(self, text):
+        for candidate in (text, TRAILING_COMMA_PATTERN.sub(r"\1", text)):
+            try:
+                value = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(value, dict):
+                return value
+        self.invalid_objects += 1
+        return None
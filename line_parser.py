@@ -0,0 +1,245 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from chunking import is_section_header
+from menu_patterns import LEADER_PATTERN, PRICE
+
+# Names the LLM would have to shorten are left to it
+MAX_NAME_CHARS = 20
+
+# Plausible single prices in cents
+MIN_PRICE_CENTS = 10
+MAX_PRICE_CENTS = 100000
+
+LIQUID_UNITS = {"l": "L", "ltr": "L", "liter": "L", "cl": "cl", "ml": "ml"}
+WEIGHT_UNITS = {"g": "g", "gr": "g", "kg": "kg"}
+
+SIZE = r"\d{1,4}(?:[.,]\d{1,3})?\s*(?:ltr|liter|cl|ml|kg|gr|l|g)\.?(?![a-zäöüß])"
+
+# One size/price pair, e.g. "0,33l 2,50 €" or "3,50"
+PAIR_PATTERN = re.compile(rf"(?:(?P<size>{SIZE})\s*(?:[-–:=/]\s*)?)?(?P<price>{PRICE})", re.IGNORECASE)
+LEADING_SIZE_PATTERN = re.compile(rf"^({SIZE})\s+", re.IGNORECASE)
+SIZE_PARTS_PATTERN = re.compile(r"(\d{1,4}(?:[.,]\d{1,3})?)\s*([a-zäöü]+)", re.IGNORECASE)
+
+# "12. Pizza" or "Nr. 12 Pizza" menu numbering
+NUMBERING_PATTERN = re.compile(r"^(?:nr\.?\s*)?\d{1,3}[.)]\s*", re.IGNORECASE)
+
+# Keywords matched at the end of a (compound) word, "Weißwein" is a wine but "Schweinebraten" is not
+BEVERAGE_KEYWORDS = (
+    "getränk", "drink", "beverage", "bier", "beer", "wein", "wine", "sekt", "prosecco", "cocktail",
+    "spirituose", "spirit", "saft", "säfte", "juice", "kaffee", "coffee", "eistee", "kräutertee", "früchtetee",
+    "minztee", "tea", "limonade", "lemonade", "wasser", "water", "schorle", "cola", "fanta", "sprite",
+    "espresso", "cappuccino", "macchiato", "kakao", "pils", "weizen", "radler", "aperitif", "digestif",
+    "longdrink", "schnaps", "whisky", "whiskey", "likör", "soda", "tonic", "smoothie", "shake",
+)
+# Food keywords also match at the start of a compound, "Wurstplatte", "Pizzabrötchen"
+FOOD_KEYWORDS = (
+    "speise", "gericht", "essen", "suppe", "soup", "salat", "salad", "pizza", "pizzen", "pasta",
+    "nudel", "fisch", "fish", "fleisch", "meat", "beilage", "dessert", "nachtisch", "starter",
+    "appetizer", "burger", "schnitzel", "steak", "braten", "filet", "snack", "frühstück",
+    "breakfast", "kinderkarte", "vegetarisch", "vegan", "flammkuchen", "kuchen", "torte", "pommes",
+    "wurst", "spätzle", "grill", "platte",
+)
+# Short keywords ending unrelated compounds ("Käseplatte" ends in "latte") only count as whole words
+BEVERAGE_WORDS = ("tee", "latte", "shot")
+FOOD_WORDS = ("side", "main")
+_ENDINGS = r"(?:e|n|en|s|es|er)?\b"
+BEVERAGE_PATTERN = re.compile(r"\b(?:" + "|".join(BEVERAGE_WORDS) + ")" + _ENDINGS
+                              + r"|(?:" + "|".join(BEVERAGE_KEYWORDS) + ")" + _ENDINGS, re.IGNORECASE)
+FOOD_PATTERN = re.compile(r"\b(?:" + "|".join(FOOD_WORDS) + ")" + _ENDINGS
+                          + r"|\b(?:" + "|".join(FOOD_KEYWORDS) + ")"
+                          + r"|(?:" + "|".join(FOOD_KEYWORDS) + ")" + _ENDINGS, re.IGNORECASE)
+
+FOOD = "food"
+BEVERAGE = "beverage"
+
+# Item fields per class, as the LLM prompt defines them
+CLASS_FIELDS = {
+    FOOD: {"hauptgruppe": "KÜCHE", "steuersatz": 7, "ordergruppe": "KÜCHE WARM", "ausser_haus": 1},
+    BEVERAGE: {"hauptgruppe": "THEKE", "steuersatz": 19, "ordergruppe": "THEKE", "ausser_haus": 0},
+}
+
+
+class MenuLineParser:
+    """
+    Rule-based parser for simple menu lines: a name, optional sizes and prices,
+    e.g. "Cola 0,33l .... 3,50 €" or "Pils 0,3l 3,20 0,5l 4,50".
+
+    Only lines it is confident about become items: a clean name of at most
+    20 characters, plausible prices, one size per price when there are
+    several, and an unambiguous food/beverage class from the size unit, the
+    section header or the name. Everything else is left for the LLM. The
+    current section header is tracked across calls and used as warengruppe.
+    """
+
+    def __init__(self):
+        self.header: Optional[str] = None
+        self.lines = 0
+        self.resolved_lines = 0
+        self.items = 0
+
+    def iter_segments(self, texts: Iterable[str]) -> Iterator[Union[str, List[Dict]]]:
+        """
+        Split streamed text into, in menu order, text for the LLM and lists of
+        items parsed from simple lines. Parsed lines before the first and after
+        the last LLM line of a section become items, parsed lines in between go
+        to the LLM with the lines around them, so no item is moved past one the
+        LLM has to extract. A section header is only sent along with LLM lines.
+        """
+        header: Optional[str] = None
+        # Parsed lines since the section's last LLM line: (lines incl. descriptions, items)
+        pending: List[Tuple[List[str], List[Dict]]] = []
+        section_has_text = False
+        previous_resolved = False
+        for text in texts:
+            for raw_line in text.splitlines():
+                line = raw_line.strip()
+                if not line:
+                    continue
+                # Descriptions of a parsed item ("mit Tomaten und Basilikum") are not items
+                if previous_resolved and line[0].islower():
+                    pending[-1][0].append(line)
+                    continue
+                parsed = self.parse_line(line)
+                previous_resolved = parsed is not None
+                if parsed is not None:
+                    pending.append(([line], parsed))
+                    continue
+                if is_section_header(line):
+                    if pending:
+                        yield [item for _, items in pending for item in items]
+                        pending = []
+                    header, section_has_text = line, False
+                    continue
+                if not section_has_text:
+                    if pending:
+                        yield [item for _, items in pending for item in items]
+                        pending = []
+                    if header:
+                        yield header
+                    section_has_text = True
+                lines = [pending_line for pending_lines, _ in pending for pending_line in pending_lines]
+                for _, items in pending:
+                    self.resolved_lines -= 1
+                    self.items -= len(items)
+                pending = []
+                yield "\n".join(lines + [line])
+        if pending:
+            yield [item for _, items in pending for item in items]
+
+    def parse_line(self, line: str) -> Optional[List[Dict]]:
+        """Items for one line, or None when the line is not simple enough (headers included)"""
+        line = line.strip()
+        if is_section_header(line):
+            header = line.lstrip("#").strip().rstrip(":").strip()
+            # "ALKOHOLFREIE GETRÄNKE" -> "Alkoholfreie Getränke"
+            self.header = header.title() if header.isupper() else header
+            return None
+        self.lines += 1
+
+        text = LEADER_PATTERN.sub(" ", line).strip()
+        tail = split_tail(text)
+        if not tail:
+            return None
+        name, pairs = tail
+        name = name.strip(" :-–\t")
+
+        # "0,5l Pils 3,90": the size comes first
+        leading = LEADING_SIZE_PATTERN.match(name)
+        if leading:
+            if len(pairs) != 1 or pairs[0][0]:
+                return None
+            pairs = [(leading.group(1), pairs[0][1])]
+            name = name[leading.end():]
+
+        name = NUMBERING_PATTERN.sub("", name).strip()
+        if not self._is_clean_name(name):
+            return None
+        if len(pairs) > 1 and (any(size is None for size, _ in pairs) or len({s for s, _ in pairs}) != len(pairs)):
+            # Several prices without sizes (small/large, glass/bottle) need interpretation
+            return None
+
+        sizes = [normalize_size(size) if size else None for size, _ in pairs]
+        item_class = self._classify(name, [parts[1] for parts in sizes if parts])
+        if item_class is None:
+            return None
+        warengruppe = self.header or ("Getränke" if item_class == BEVERAGE else None)
+        if not warengruppe:
+            return None
+
+        items = []
+        for (size, price), size_parts in zip(pairs, sizes):
+            cents = price_cents(price)
+            if cents is None or not MIN_PRICE_CENTS <= cents <= MAX_PRICE_CENTS:
+                return None
+            item_name = f"{size_parts[0]} {name}" if size_parts else name
+            if len(item_name) > MAX_NAME_CHARS:
+                return None
+            items.append({"name": item_name, "quantity": 1, "price": cents, "warengruppe": warengruppe,
+                          **CLASS_FIELDS[item_class]})
+
+        self.resolved_lines += 1
+        self.items += len(items)
+        return items
+
+    def _is_clean_name(self, name):
+        letters = [c for c in name if c.isalpha()]
+        if len(letters) < 3 or any(c.isdigit() for c in name):
+            return False
+        # ALL CAPS names need the LLM's casing, stray symbols hint at OCR noise or allergen markers
+        if len(letters) > 3 and all(c.isupper() for c in letters):
+            return False
+        return not re.search(r"[^\w\s&'.,/()+-]", name)
+
+    def _classify(self, name, units):
+        classes = set()
+        for unit in units:
+            if unit in LIQUID_UNITS.values():
+                classes.add(BEVERAGE)
+            elif unit in WEIGHT_UNITS.values():
+                classes.add(FOOD)
+        for text in (self.header, name):
+            if not text:
+                continue
+            beverage = bool(BEVERAGE_PATTERN.search(text))
+            food = bool(FOOD_PATTERN.search(text))
+            if beverage and food:
+                # "Salat mit Weißwein-Dressing", left to the LLM
+                return None
+            if beverage or food:
+                classes.add(BEVERAGE if beverage else FOOD)
+        return classes.pop() if len(classes) == 1 else None
+
+
+def split_tail(text):
+    """
+    (name, [(size, price), ...]) for the size/price pairs a line ends with, or
+    None. The pairs are taken off the end one at a time, so a long line of
+    numbers costs one scan instead of a backtracking regex.
+    """
+    pairs = []
+    end = len(text.rstrip())
+    for match in reversed(list(PAIR_PATTERN.finditer(text, 0, end))):
+        # Pairs are separated by whitespace only and start a word
+        if text[match.end():end].strip() or (match.start() and not text[match.start() - 1].isspace()):
+            break
+        pairs.append((match.group("size"), match.group("price")))
+        end = match.start()
+    if not pairs:
+        return None
+    return text[:end], pairs[::-1]
+
+
+def normalize_size(size):
+    """("0.33L", "L") for "0,33 l", ("330ml", "ml") for "330 ml\""""
+    match = SIZE_PARTS_PATTERN.match(size.replace(" ", ""))
+    amount, unit = match.group(1).replace(",", "."), match.group(2).lower().rstrip(".")
+    unit = LIQUID_UNITS.get(unit) or WEIGHT_UNITS.get(unit, unit)
+    return f"{amount}{unit}", unit
+
+
+def price_cents(price):
+    digits = re.search(r"(\d{1,4})(?:[.,](\d{2})|,-)", price)
+    if not digits:
+        return None
+    return int(digits.group(1)) * 100 + int(digits.group(2) or 0)
@@ -1,10 +1 @@
-from abc import ABC,abstractmethod
-
-class BaseLLMClient(ABC):
-    @abstractmethod
-    def generateJ_text(self,prompt: str,**kwargs) -> str:
-        """
-        Given a prompt, call the LLM and return generated text.
-        Additional kwargs can be model-specific options.
-        """
-        pass
\ No newline at end of file
+from .base_client import OUTPUT_MODES, BaseLLMClient, ClientCapabilities
@@ -1,11 +1,58 @@
-from abc import ABC ,abstractmethod
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Iterator, NamedTuple, Optional
+
+# Structured output modes from most to least constrained, see BaseLLMClient.structured_output_params
+OUTPUT_MODES = ("json_schema", "json_object", "function", "text")
+
+
+class ClientCapabilities(NamedTuple):
+    """What a client can do for a model, for schedulers sizing and pacing requests"""
+    max_context_tokens: int                     # prompt plus completion
+    max_output_tokens: int
+    streaming: bool                             # stream_text yields pieces as they are generated
+    batch: bool                                 # an offline batch API is available (see batch_processor.py)
+    output_mode: str = "text"                   # best structured output mode, see default_output_mode
+    requests_per_minute: Optional[float] = None  # client-side limits, None when unlimited
+    tokens_per_minute: Optional[float] = None
+    fixed_model: bool = False                   # requests may go to another model than the one asked for
+
 
 class BaseLLMClient(ABC):
+    """
+    Interface of every LLM client returned by factory.get_llm_client.
+
+    generate_text is the only call a client has to implement. It must be safe
+    to call from several threads at once, agenerate_text runs it in a worker
+    thread so asyncio schedulers can drive any client concurrently.
+    """
+
     @abstractmethod
-    def process_menu_text(ABC):
-        
-       """
-        Send the extracted menu text to the LLM, get structured info back.
-        Return a dict representing the structured menu data, e.g. list of items with name, quantity, price, group etc.
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        """
+        Given a prompt, call the LLM and return generated text.
+        Additional kwargs can be model-specific options, model selects the model.
         """
-    pass 
\ No newline at end of file
+
+    async def agenerate_text(self, prompt: str, **kwargs) -> str:
+        """generate_text without blocking the event loop"""
+        return await asyncio.to_thread(self.generate_text, prompt, **kwargs)
+
+    def stream_text(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Yield the completion in pieces. Clients without streaming yield it in one piece."""
+        yield self.generate_text(prompt, **kwargs)
+
+    @abstractmethod
+    def get_capabilities(self, model: str) -> ClientCapabilities:
+        """Limits and features of this client for a model"""
+
+    def default_output_mode(self, model: str) -> str:
+        """Best structured output mode the model supports"""
+        return self.get_capabilities(model).output_mode
+
+    @staticmethod
+    def structured_output_params(schema: dict, name: str, mode: str) -> dict:
+        """Request parameters that constrain the output to schema, clients without structured output only have text"""
+        if mode == "text":
+            return {}
+        raise ValueError(f"Unsupported output mode: {mode}")
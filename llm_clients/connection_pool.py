@@ -0,0 +1,69 @@
+import os
+import threading
+from typing import Dict, Optional
+
+from openai import DefaultHttpxClient
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# HTTP connection pool of a client, shared by all sessions and chunk workers of the process
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
+KEEPALIVE_EXPIRY = 90.0
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+# Per read, a long completion still streams in within this between pieces
+READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+POOL_TIMEOUT = 30.0
+
+
+class ConnectionStats:
+    """
+    Requests sent and connections opened by an HTTP client, from httpcore's
+    trace events. A request that opened no connection reused a pooled one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def trace(self, event_name: str, info: Dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    def on_request(self, request) -> None:
+        request.extensions["trace"] = self.trace
+        with self._lock:
+            self.requests += 1
+
+    def stats(self) -> Dict:
+        """Requests, new connections and TLS handshakes, and the share of requests on a reused connection"""
+        with self._lock:
+            reused = max(0, self.requests - self.connections)
+            return {"requests": self.requests, "connections": self.connections,
+                    "tls_handshakes": self.tls_handshakes, "reused_requests": reused,
+                    "reuse_rate": reused / self.requests if self.requests else None}
+
+
+def make_http_client(stats: ConnectionStats) -> Optional["httpx.Client"]:
+    """
+    HTTP client for the OpenAI SDK with a bounded keep-alive pool and separate
+    connect and read timeouts. None without httpx, the SDK then uses its defaults.
+    """
+    if not HTTPX_AVAILABLE:
+        return None
+    return DefaultHttpxClient(
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                            keepalive_expiry=KEEPALIVE_EXPIRY),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT, pool=POOL_TIMEOUT),
+        event_hooks={"request": [stats.on_request]},
+    )
@@ -1,11 +1,72 @@
+import os
+import threading
 from .openai_client import OpenAIClient
 from .others_llm_client import OtherLLMClient
-from typing import Optional
+from .replay_client import RecordingClient, ReplayClient
+from .routing_client import RoutingClient, parse_backends
+from .base_client import BaseLLMClient
+from typing import Dict, Optional, Tuple
 
-def get_llm_client(provider: str = "openai", api_key: Optional[str] = None):
+# Append every prompt/response pair to this JSONL file for the replay provider (off when unset)
+RECORD_PATH = os.getenv("LLM_RECORD_PATH")
+
+# Process-wide clients per provider, API key and options, see get_shared_llm_client
+_shared_clients: Dict[Tuple, BaseLLMClient] = {}
+_shared_lock = threading.Lock()
+_shared_stats = {"created": 0, "reused": 0}
+
+def get_llm_client(provider: str = "openai", api_key: Optional[str] = None, **options) -> BaseLLMClient:
+    """
+    A client implementing BaseLLMClient, see get_capabilities for its limits per model.
+    options are passed to the client, e.g. path, latency, jitter and error_rate for "replay".
+    "router" routes between backends=[{"provider": ..., "name": ..., "model": ..., **options}, ...]
+    (LLM_ROUTER_BACKENDS by default). record_path wraps the client in a RecordingClient.
+    """
+    record_path = options.pop("record_path", RECORD_PATH)
     if provider == "openai":
-        return OpenAIClient(api_key=api_key)
+        client = OpenAIClient(api_key=api_key, **options)
     elif provider == "other":
-        return OtherLLMClient(api_key=api_key)
-    else: 
-        raise ValueError(f"Unsupported LLM provider:{provider}")
\ No newline at end of file
+        client = OtherLLMClient(api_key=api_key)
+    elif provider == "router":
+        backends = []
+        for index, spec in enumerate(options.pop("backends", None) or parse_backends()):
+            spec = dict(spec)
+            backend_provider = spec.pop("provider")
+            name = spec.pop("name", None) or f"{backend_provider}-{index}"
+            model = spec.pop("model", None)
+            backend_key = spec.pop("api_key", api_key)
+            # The router records its calls itself, a backend only when its spec asks for it
+            spec.setdefault("record_path", None)
+            backends.append((name, get_llm_client(backend_provider, backend_key, **spec), model))
+        client = RoutingClient(backends, **options)
+    elif provider == "replay":
+        # Recorded responses, no network or API key needed
+        return ReplayClient(**options)
+    else:
+        raise ValueError(f"Unsupported LLM provider:{provider}")
+    if record_path:
+        client = RecordingClient(client, record_path)
+    return client
+
+
+def get_shared_llm_client(provider: str = "openai", api_key: Optional[str] = None, **options) -> BaseLLMClient:
+    """
+    The process-wide client for these arguments, created on first use. Clients
+    are thread-safe, so every session and chunk worker shares one HTTP
+    connection pool instead of opening new connections on each rerun.
+    """
+    key = (provider, api_key, tuple(sorted((name, repr(value)) for name, value in options.items())))
+    with _shared_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = _shared_clients[key] = get_llm_client(provider, api_key, **options)
+            _shared_stats["created"] += 1
+        else:
+            _shared_stats["reused"] += 1
+        return client
+
+
+def shared_client_stats() -> Dict[str, int]:
+    """Shared clients created and how often an existing one was handed out again"""
+    with _shared_lock:
+        return dict(_shared_stats, clients=len(_shared_clients))
@@ -1,27 +1,235 @@
-import os 
-from openai import OpenAI , OpenAIError
+import os
+import time
+from typing import Iterator
+from openai import (OpenAI , OpenAIError, APIConnectionError, APIStatusError, RateLimitError)
+from token_budget import model_limits
+from .base_client import BaseLLMClient, ClientCapabilities
+from .connection_pool import ConnectionStats, make_http_client
+from .rate_limiter import MAX_RETRIES, RETRYABLE_STATUS_CODES, backoff_delay, get_rate_limiter
+from .response_cache import ResponseCache
 
-class OpenAIClient:
+# Completion tokens reserved in the tokens-per-minute budget when max_tokens is not given
+DEFAULT_COMPLETION_RESERVE = 1000
+
+# Structured output support per model family, matched by longest prefix
+#   json_schema: response_format with a strict JSON schema
+#   json_object: response_format JSON mode, any valid JSON object
+#   function:    forced function call with the schema as its parameters
+STRUCTURED_OUTPUT_MODES = {
+    "gpt-3.5-turbo": "function",
+    "gpt-4": "function",
+    "gpt-4-turbo": "json_object",
+    "gpt-4-1106": "json_object",
+    "gpt-4-0125": "json_object",
+    "gpt-4o": "json_schema",
+    "gpt-4.1": "json_schema",
+    "o1": "json_schema",
+    "o3": "json_schema",
+    "o4-mini": "json_schema",
+}
+
+# Responses that ended normally, anything else (length, content_filter) is not cached
+COMPLETE_FINISH_REASONS = ("stop", "tool_calls")
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors, 408/409/429 and 5xx are transient, everything else is not"""
+    if isinstance(error, APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(error, RateLimitError):
+        # An exhausted quota does not recover by waiting
+        return getattr(error, "code", None) != "insufficient_quota"
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+class OpenAIClient(BaseLLMClient):
     from typing import Optional
 
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key =os.getenv("API")
+    def __init__(self, api_key: Optional[str] = None, cache: Optional[ResponseCache] = None,
+                 max_retries: int = MAX_RETRIES):
+        self.api_key = api_key or os.getenv("API")
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
-        
-        self.client = OpenAI(api_key=self.api_key)
-    
+
+        # Retries are handled here so they go through the shared rate limiter.
+        # One pooled HTTP client keeps connections warm across chunks and sessions, see get_shared_llm_client
+        self.connections = ConnectionStats()
+        self.client = OpenAI(api_key=self.api_key, max_retries=0, http_client=make_http_client(self.connections))
+        self.max_retries = max_retries
+
+        # Opt-in response cache, either passed in or enabled with LLM_CACHE_PATH
+        if cache is None and os.getenv("LLM_CACHE_PATH"):
+            cache = ResponseCache(os.environ["LLM_CACHE_PATH"])
+        self.cache = cache
+
     def generate_text(self,prompt:str, **kwargs) ->str:
-        try: 
-            response = self.client.chat.completions.create(
-                model=kwargs.get("model", "gpt-4"),
-                messages=[{"role": "user", "content": prompt}],
-                **kwargs
-            )
-            return response.choices[0].message.content.strip()
+        model = kwargs.pop("model", "gpt-4")
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(model, prompt, kwargs)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        response, latency = self._create_with_retries(model, prompt, kwargs)
+        message = response.choices[0].message
+        # With function calling the output is the call's arguments
+        if message.tool_calls:
+            text = message.tool_calls[0].function.arguments.strip()
+        else:
+            text = (message.content or "").strip()
+
+        # Truncated or filtered responses are not reused
+        if cache_key is not None and response.choices[0].finish_reason in COMPLETE_FINISH_REASONS:
+            usage = response.usage
+            self.cache.set(cache_key, text, model=model, latency=latency, # type: ignore
+                           prompt_tokens=usage.prompt_tokens if usage else 0,
+                           completion_tokens=usage.completion_tokens if usage else 0)
+        return text
+
+    def _create_with_retries(self, model, prompt, kwargs):
+        """
+        Send a chat completion through the process-wide rate limiter of the model.
+        Transient errors are retried with jittered exponential backoff, honouring retry-after.
+        Returns (response, latency of the successful attempt).
+        """
+        limiter = get_rate_limiter(model)
+        reserved = len(prompt) // 4 + (kwargs.get("max_tokens") or DEFAULT_COMPLETION_RESERVE)
+        attempt = 0
+        while True:
+            limiter.acquire(reserved)
+            try:
+                start = time.perf_counter()
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    **kwargs
+                )
+                latency = time.perf_counter() - start
+            except OpenAIError as e :
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    retries = f" after {attempt} retries" if attempt else ""
+                    raise RuntimeError(f"OpenAI API error{retries}: {e}")
+                delay = backoff_delay(attempt, e)
+                if isinstance(e, RateLimitError):
+                    # Every other request to this model backs off as well
+                    limiter.pause(delay)
+                limiter.record_retry()
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            # Streamed responses report usage in their last event instead
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                limiter.settle(reserved, usage.total_tokens)
+            return response, latency
+
+    def stream_text(self, prompt: str, **kwargs) -> Iterator[str]:
+        """
+        Like generate_text, but yield the completion in pieces as they are generated.
+        Only the request itself is retried, a stream that breaks off raises RuntimeError.
+        """
+        model = kwargs.pop("model", "gpt-4")
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(model, prompt, kwargs)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        start = time.perf_counter()
+        stream, _ = self._create_with_retries(
+            model, prompt, dict(kwargs, stream=True, stream_options={"include_usage": True}))
+        parts = []
+        finish_reason = None
+        usage = None
+        try:
+            for event in stream:
+                if event.usage is not None:
+                    usage = event.usage
+                if not event.choices:
+                    continue
+                choice = event.choices[0]
+                piece = None
+                if choice.delta is not None:
+                    if choice.delta.tool_calls:
+                        function = choice.delta.tool_calls[0].function
+                        piece = function.arguments if function is not None else None
+                    else:
+                        piece = choice.delta.content
+                if piece:
+                    parts.append(piece)
+                    yield piece
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
         except OpenAIError as e :
-            raise RuntimeError(f"OpenAI API error: {e}")
-        
-        
-    
-        
\ No newline at end of file
+            raise RuntimeError(f"OpenAI API error while streaming: {e}")
+        finally:
+            stream.close()
+        latency = time.perf_counter() - start
+
+        if usage is not None:
+            reserved = len(prompt) // 4 + (kwargs.get("max_tokens") or DEFAULT_COMPLETION_RESERVE)
+            get_rate_limiter(model).settle(reserved, usage.total_tokens)
+        if cache_key is not None and finish_reason in COMPLETE_FINISH_REASONS:
+            self.cache.set(cache_key, "".join(parts).strip(), model=model, latency=latency, # type: ignore
+                           prompt_tokens=usage.prompt_tokens if usage else 0,
+                           completion_tokens=usage.completion_tokens if usage else 0)
+
+    @staticmethod
+    def default_output_mode(model: str) -> str:
+        """Best structured output mode the model supports"""
+        matches = [name for name in STRUCTURED_OUTPUT_MODES if model == name or model.startswith(name + "-")]
+        if not matches:
+            return "text"
+        return STRUCTURED_OUTPUT_MODES[max(matches, key=len)]
+
+    @staticmethod
+    def structured_output_params(schema: dict, name: str, mode: str) -> dict:
+        """
+        Request parameters that constrain the output to schema (an object schema).
+        Pass them to generate_text or stream_text, which return the JSON text in every mode.
+        """
+        if mode == "json_schema":
+            return {"response_format": {"type": "json_schema",
+                                        "json_schema": {"name": name, "schema": schema, "strict": True}}}
+        if mode == "json_object":
+            return {"response_format": {"type": "json_object"}}
+        if mode == "function":
+            return {"tools": [{"type": "function", "function": {"name": name, "parameters": schema}}],
+                    "tool_choice": {"type": "function", "function": {"name": name}}}
+        if mode == "text":
+            return {}
+        raise ValueError(f"Unsupported output mode: {mode}")
+
+    def get_capabilities(self, model: str) -> ClientCapabilities:
+        """Context and output limits, structured output mode and the shared client-side rate limits of a model"""
+        context, max_output = model_limits(model)
+        limiter = get_rate_limiter(model)
+        return ClientCapabilities(max_context_tokens=context, max_output_tokens=max_output,
+                                  streaming=True, batch=True, output_mode=self.default_output_mode(model),
+                                  requests_per_minute=limiter.requests.capacity,
+                                  tokens_per_minute=limiter.tokens.capacity)
+
+    def connection_stats(self):
+        """Requests, new connections, TLS handshakes and connection reuse rate of the HTTP pool"""
+        return self.connections.stats()
+
+    def close(self) -> None:
+        """Close the pooled HTTP connections"""
+        self.client.close()
+
+    def cache_stats(self):
+        """Response cache hits, misses, saved seconds and tokens, or None when caching is off"""
+        return self.cache.stats() if self.cache is not None else None
+
+    def rate_limit_stats(self, model: str = "gpt-4"):
+        """Throttled requests, seconds waited and retries of the shared limiter for a model"""
+        return get_rate_limiter(model).stats()
+
+
+
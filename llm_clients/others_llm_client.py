@@ -1,11 +1,17 @@
 from typing import Optional
-from . import BaseLLMClient
+from token_budget import model_limits
+from .base_client import BaseLLMClient, ClientCapabilities
 
 class OtherLLMClient(BaseLLMClient):
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
-    
-    def generateJ_text(self, prompt: str, **kwargs) -> str:
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
         # Implement future llm integration here.
         raise NotImplementedError("Other LLM client is not implemented yet.")
-    
\ No newline at end of file
+
+    def get_capabilities(self, model: str) -> ClientCapabilities:
+        context, max_output = model_limits(model)
+        return ClientCapabilities(max_context_tokens=context, max_output_tokens=max_output,
+                                  streaming=False, batch=False)
+
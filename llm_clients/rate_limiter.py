@@ -0,0 +1,142 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+# Client-side limits per model, shared by every client in the process
+DEFAULT_REQUESTS_PER_MINUTE = int(os.getenv("LLM_RPM", "500"))
+DEFAULT_TOKENS_PER_MINUTE = int(os.getenv("LLM_TPM", "90000"))
+
+# Retries of one request and the jittered exponential backoff between them
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most one minute's worth.
+
+    reserve() debits immediately, even into a negative balance, and returns how
+    long the caller has to wait, so callers are served in arrival order without polling.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Give back (or with a negative amount, take) tokens after the real cost is known"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets plus a shared pause after rate-limit errors"""
+
+    def __init__(self, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.waited_seconds = 0.0
+        self.throttled_requests = 0
+        self.retries = 0
+
+    def acquire(self, tokens: int) -> float:
+        """Block until a request of this many tokens may be sent, return the time waited"""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        with self._lock:
+            wait = max(wait, self._paused_until - time.monotonic())
+            if wait > 0:
+                self.waited_seconds += wait
+                self.throttled_requests += 1
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
+
+    def settle(self, reserved_tokens: int, used_tokens: int) -> None:
+        """Correct the token bucket once the response reports the real usage"""
+        self.tokens.refund(reserved_tokens - used_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller, e.g. for the retry-after of a 429"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "throttled_requests": self.throttled_requests,
+                "waited_seconds": round(self.waited_seconds, 3),
+                "retries": self.retries,
+            }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """The process-wide limiter for a model, so all chunks and sessions share one budget"""
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limiter = _limiters[model] = RateLimiter()
+        return limiter
+
+
+def retry_after(error) -> Optional[float]:
+    """Seconds from the retry-after-ms or retry-after header of an API error, if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def backoff_delay(attempt: int, error=None) -> float:
+    """Retry-after when the server sent one, otherwise full-jitter exponential backoff"""
+    delay = retry_after(error) if error is not None else None
+    if delay is not None:
+        return min(delay, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
@@ -0,0 +1,170 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional
+
+from token_budget import model_limits
+from .base_client import OUTPUT_MODES, BaseLLMClient, ClientCapabilities
+from .response_cache import ResponseCache
+
+# Replay settings for get_llm_client("replay")
+DEFAULT_REPLAY_PATH = os.getenv("LLM_REPLAY_PATH", "llm_recording.jsonl")
+
+# Characters per streamed piece when replaying with stream_text
+STREAM_PIECE_CHARS = 40
+
+
+def _output_mode(params: Dict) -> str:
+    """Structured output mode a request was sent with, see OpenAIClient.structured_output_params"""
+    response_format = params.get("response_format") or {}
+    if response_format.get("type") in ("json_schema", "json_object"):
+        return response_format["type"]
+    return "function" if params.get("tools") else "text"
+
+
+class RecordingClient(BaseLLMClient):
+    """
+    Wraps a real client and appends every prompt/response pair to a JSONL file
+    for ReplayClient: {"model", "prompt", "params", "response", "latency"}.
+    Only successful calls are recorded, errors are raised as usual.
+    """
+
+    def __init__(self, client: BaseLLMClient, path: str):
+        self.client = client
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        start = time.perf_counter()
+        response = self.client.generate_text(prompt, **kwargs)
+        self._record(prompt, kwargs, response, time.perf_counter() - start)
+        return response
+
+    def stream_text(self, prompt: str, **kwargs) -> Iterator[str]:
+        start = time.perf_counter()
+        parts = []
+        for piece in self.client.stream_text(prompt, **kwargs):
+            parts.append(piece)
+            yield piece
+        self._record(prompt, kwargs, "".join(parts).strip(), time.perf_counter() - start)
+
+    def get_capabilities(self, model: str) -> ClientCapabilities:
+        return self.client.get_capabilities(model)
+
+    def structured_output_params(self, schema: dict, name: str, mode: str) -> dict:
+        return self.client.structured_output_params(schema, name, mode)
+
+    def _record(self, prompt, params, response, latency):
+        params = dict(params)
+        record = {"model": params.pop("model", "gpt-4"), "prompt": prompt, "params": params,
+                  "response": response, "latency": round(latency, 4)}
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.recorded += 1
+
+
+class ReplayClient(BaseLLMClient):
+    """
+    Serves responses recorded by RecordingClient without network access.
+
+    Responses are looked up by model and prompt. Every call waits latency
+    seconds (the recorded latency when None) plus or minus up to jitter
+    seconds, and fails with RuntimeError with probability error_rate, like a
+    request that failed after all retries. Latency and failures are drawn
+    from a generator seeded with seed, the prompt and the call count of the
+    prompt, so runs are reproducible whatever order concurrent calls arrive in.
+    """
+
+    def __init__(self, path: str = DEFAULT_REPLAY_PATH, latency: Optional[float] = None,
+                 jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0,
+                 max_context_tokens: Optional[int] = None):
+        self.path = path
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self.max_context_tokens = max_context_tokens
+
+        self._records: Dict[str, Dict] = {}
+        self._modes: Dict[str, Counter] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self._records[ResponseCache.make_key(record["model"], record["prompt"])] = record
+                self._modes.setdefault(record["model"], Counter())[_output_mode(record.get("params") or {})] += 1
+
+        self._lock = threading.Lock()
+        self._calls: Counter = Counter()
+        self.calls = 0
+        self.errors = 0
+        self.misses = 0
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        record, delay = self._prepare(prompt, kwargs)
+        time.sleep(delay)
+        return record["response"]
+
+    def stream_text(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Yield the recorded response in pieces, spread evenly over the call's latency"""
+        record, delay = self._prepare(prompt, kwargs)
+        response = record["response"]
+        pieces: List[str] = [response[i:i + STREAM_PIECE_CHARS]
+                             for i in range(0, len(response), STREAM_PIECE_CHARS)] or [""]
+        for piece in pieces:
+            time.sleep(delay / len(pieces))
+            yield piece
+
+    def get_capabilities(self, model: str) -> ClientCapabilities:
+        """The model's limits, with the output mode most requests to it were recorded with"""
+        context, max_output = model_limits(model)
+        modes = self._modes.get(model)
+        return ClientCapabilities(max_context_tokens=self.max_context_tokens or context,
+                                  max_output_tokens=max_output, streaming=True, batch=False,
+                                  output_mode=modes.most_common(1)[0][0] if modes else "text")
+
+    @staticmethod
+    def structured_output_params(schema: dict, name: str, mode: str) -> dict:
+        # Responses are matched on the prompt alone, the mode is only reflected in its wording
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unsupported output mode: {mode}")
+        return {}
+
+    def stats(self) -> Dict:
+        """Calls served, injected errors and prompts missing from the recording"""
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors, "misses": self.misses,
+                    "recorded": len(self._records)}
+
+    def _prepare(self, prompt, kwargs):
+        """The record for a call and its delay, raising the injected or missing-record error"""
+        key = ResponseCache.make_key(kwargs.get("model", "gpt-4"), prompt)
+        with self._lock:
+            self.calls += 1
+            call = self._calls[key]
+            self._calls[key] += 1
+            record = self._records.get(key)
+            if record is None:
+                self.misses += 1
+        if record is None:
+            raise RuntimeError(f"No recorded response for this prompt in {self.path}")
+
+        rng = random.Random(f"{self.seed}:{key}:{call}")
+        delay = record.get("latency", 0.0) if self.latency is None else self.latency
+        if self.jitter:
+            delay += rng.uniform(-self.jitter, self.jitter)
+        if rng.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            time.sleep(max(0.0, delay))
+            raise RuntimeError("Replayed LLM error (injected)")
+        return record, max(0.0, delay)
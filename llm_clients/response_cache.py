@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Defaults for the prompt/response cache
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+class ResponseCache:
+    """
+    SQLite cache of LLM responses keyed on model, request parameters and prompt.
+
+    The cache is bounded by entry count and total response size, least
+    recently used entries are evicted first. Every entry remembers how long
+    the API call took and how many tokens it used, so hits can be reported
+    as saved latency and saved tokens.
+    """
+
+    def __init__(self,
+                 path: str = ":memory:",
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            # Several server processes may share one cache file
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Key for a request: the model, every request parameter and the prompt"""
+        payload = json.dumps({"model": model, "params": params or {}, "prompt": prompt},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key and count the hit or miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, latency, prompt_tokens, completion_tokens, expires_at FROM responses WHERE key = ?",
+                (key,)).fetchone()
+            if row is None or (row[4] is not None and row[4] <= now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self.saved_seconds += row[1]
+            self.saved_prompt_tokens += row[2]
+            self.saved_completion_tokens += row[3]
+            return row[0]
+
+    def set(self, key: str, response: str, model: str, latency: float = 0.0,
+            prompt_tokens: int = 0, completion_tokens: int = 0, ttl: Optional[float] = None) -> None:
+        """Store a response with the latency and token usage of the call that produced it"""
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, latency, prompt_tokens, completion_tokens, now, expires_at, now))
+            self._evict()
+
+    def invalidate(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of this process and the size of the cache"""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+            "saved_completion_tokens": self.saved_completion_tokens,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        # Drop expired entries first, then the least recently used ones until both caps hold
+        self._conn.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        excess_entries = entries - self.max_entries
+        excess_bytes = size - self.max_bytes
+        removed_entries = 0
+        removed_bytes = 0
+        doomed = []
+        for key, entry_size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            if removed_entries >= excess_entries and removed_bytes >= excess_bytes:
+                break
+            doomed.append((key,))
+            removed_entries += 1
+            removed_bytes += entry_size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .base_client import BaseLLMClient, ClientCapabilities
+
+logger = logging.getLogger(__name__)
+
+# Backends of get_llm_client("router") as a JSON list, e.g.
+# [{"provider": "openai", "model": "gpt-4o"}, {"provider": "openai", "name": "fallback", "api_key": "...", "model": "gpt-4"}]
+ROUTER_BACKENDS = os.getenv("LLM_ROUTER_BACKENDS")
+
+# Calls per backend the rolling latency and error rate are computed over, older calls age out
+HEALTH_WINDOW = 50
+HEALTH_WINDOW_SECONDS = 300.0
+# A backend's circuit opens at this error rate over at least MIN_CALLS calls, or after CONSECUTIVE_FAILURES
+ERROR_RATE_THRESHOLD = 0.5
+MIN_CALLS = 5
+CONSECUTIVE_FAILURES = 3
+# Seconds an open circuit waits before one trial call is let through
+COOLDOWN_SECONDS = 30.0
+# Routing decisions kept for stats()
+DECISION_LOG_SIZE = 200
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BackendHealth:
+    """Rolling latency and outcome of the last calls to one backend, plus its circuit breaker state"""
+
+    def __init__(self, window: int = HEALTH_WINDOW):
+        # (time, latency, ok) of the latest calls
+        self.calls: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        # A half-open circuit's trial call is in flight
+        self.probing = False
+        self.total_calls = 0
+        self.total_errors = 0
+        self.routed = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        now = time.monotonic()
+        self.calls.append((now, latency, ok))
+        self.total_calls += 1
+        if ok:
+            if self.opened_at is not None:
+                # The trial call succeeded, start over with a clean window
+                self.calls.clear()
+                self.calls.append((now, latency, ok))
+            self.consecutive_failures = 0
+            self.opened_at = None
+            return
+        self.total_errors += 1
+        self.consecutive_failures += 1
+        if self.opened_at is not None or self.consecutive_failures >= CONSECUTIVE_FAILURES or (
+                len(self.calls) >= MIN_CALLS and self.error_rate() >= ERROR_RATE_THRESHOLD):
+            self.opened_at = time.monotonic()
+
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        return HALF_OPEN if time.monotonic() - self.opened_at >= COOLDOWN_SECONDS else OPEN
+
+    def error_rate(self) -> float:
+        self._expire()
+        if not self.calls:
+            return 0.0
+        return sum(1 for _, _, ok in self.calls if not ok) / len(self.calls)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile (0-100) of the successful calls in the window, nearest rank"""
+        self._expire()
+        latencies = sorted(latency for _, latency, ok in self.calls if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, max(0, int(round(q / 100 * len(latencies))) - 1))]
+
+    def score(self) -> Tuple[int, float]:
+        """Sort key: circuit state first, then median latency inflated by the error rate"""
+        state = self.state()
+        # While the trial call is out, a half-open backend is as good as open
+        rank = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[OPEN if state == HALF_OPEN and self.probing else state]
+        median = self.percentile(50)
+        if median is None:
+            # Unused backends are tried early so they get measured, failing ones late until their errors age out
+            return rank, float("inf") if self.calls else 0.0
+        return rank, median * (1 + self.error_rate())
+
+    def _expire(self):
+        cutoff = time.monotonic() - HEALTH_WINDOW_SECONDS
+        while self.calls and self.calls[0][0] < cutoff:
+            self.calls.popleft()
+
+
+class RoutingClient(BaseLLMClient):
+    """
+    Routes every call to the healthiest, fastest of several backends.
+
+    Backends are ordered by circuit state (closed, then half-open, then
+    open) and by their rolling median latency weighted with the error rate.
+    A failed call is retried on the next backend, so a degraded backend
+    costs one failed attempt instead of a failed chunk. Repeated failures
+    open a backend's circuit: it only gets calls when every other backend
+    failed too, until one trial call after COOLDOWN_SECONDS succeeds.
+
+    backends are (name, client, model) triples, model replaces the model of
+    the request when set (providers name their models differently).
+    """
+
+    def __init__(self, backends: Sequence[Tuple[str, BaseLLMClient, Optional[str]]],
+                 window: int = HEALTH_WINDOW):
+        if not backends:
+            raise ValueError("RoutingClient needs at least one backend")
+        self.backends = list(backends)
+        self.health: Dict[str, BackendHealth] = {name: BackendHealth(window) for name, _, _ in self.backends}
+        self.decisions: Deque[Dict] = deque(maxlen=DECISION_LOG_SIZE)
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        errors = []
+        for name, client, model, probe in self._attempts():
+            start = time.perf_counter()
+            try:
+                text = client.generate_text(prompt, **self._request(kwargs, model))
+            except Exception as e:
+                self._record(name, time.perf_counter() - start, e)
+                errors.append(f"{name}: {e}")
+                continue
+            finally:
+                if probe:
+                    self._end_probe(name)
+            self._record(name, time.perf_counter() - start, None, failover=bool(errors))
+            return text
+        raise RuntimeError(f"All LLM backends failed: {'; '.join(errors)}")
+
+    def stream_text(self, prompt: str, **kwargs) -> Iterator[str]:
+        """Fails over while nothing has been yielded yet, a stream that breaks off later raises"""
+        errors = []
+        for name, client, model, probe in self._attempts():
+            start = time.perf_counter()
+            started = False
+            try:
+                for piece in client.stream_text(prompt, **self._request(kwargs, model)):
+                    started = True
+                    yield piece
+            except Exception as e:
+                self._record(name, time.perf_counter() - start, e)
+                if started:
+                    raise
+                errors.append(f"{name}: {e}")
+                continue
+            finally:
+                if probe:
+                    self._end_probe(name)
+            self._record(name, time.perf_counter() - start, None, failover=bool(errors))
+            return
+        raise RuntimeError(f"All LLM backends failed: {'; '.join(errors)}")
+
+    def get_capabilities(self, model: str) -> ClientCapabilities:
+        """What every backend can do, since a chunk may go to any of them"""
+        capabilities = [client.get_capabilities(backend_model or model) for _, client, backend_model in self.backends]
+        modes = {c.output_mode for c in capabilities}
+        requests = [c.requests_per_minute for c in capabilities]
+        tokens = [c.tokens_per_minute for c in capabilities]
+        return ClientCapabilities(
+            max_context_tokens=min(c.max_context_tokens for c in capabilities),
+            max_output_tokens=min(c.max_output_tokens for c in capabilities),
+            streaming=all(c.streaming for c in capabilities),
+            batch=False,
+            # Prompts are built for one mode, mixed backends fall back to plain text
+            output_mode=modes.pop() if len(modes) == 1 else "text",
+            requests_per_minute=sum(requests) if None not in requests else None,  # type: ignore
+            tokens_per_minute=sum(tokens) if None not in tokens else None,  # type: ignore
+            # A backend model replaces the requested one
+            fixed_model=any(backend_model for _, _, backend_model in self.backends)
+                        or any(c.fixed_model for c in capabilities),
+        )
+
+    def structured_output_params(self, schema: dict, name: str, mode: str) -> dict:
+        if mode == "text":
+            return {}
+        # Only reached when all backends share the mode, see get_capabilities
+        return self.backends[0][1].structured_output_params(schema, name, mode)
+
+    def stats(self) -> Dict:
+        """Per backend: state, calls, errors, rolling error rate, latency percentiles and calls routed to it first"""
+        with self._lock:
+            backends = {}
+            for name, health in self.health.items():
+                backends[name] = {"state": health.state(), "routed": health.routed, "calls": health.total_calls,
+                                  "errors": health.total_errors, "error_rate": health.error_rate(),
+                                  "p50": health.percentile(50), "p95": health.percentile(95),
+                                  "p99": health.percentile(99)}
+            return {"backends": backends, "failovers": self.failovers, "decisions": list(self.decisions)}
+
+    def _route(self) -> List[Tuple[str, BaseLLMClient, Optional[str]]]:
+        """Backends in the order to try them, logging the decision"""
+        with self._lock:
+            order = sorted(self.backends, key=lambda backend: self.health[backend[0]].score())
+            self.health[order[0][0]].routed += 1
+            self.decisions.append({"time": time.time(), "backend": order[0][0],
+                                   "order": [name for name, _, _ in order],
+                                   "states": {name: self.health[name].state() for name, _, _ in order}})
+        return order
+
+    def _attempts(self) -> Iterator[Tuple[str, BaseLLMClient, Optional[str], bool]]:
+        """
+        (name, client, model, probe) in the order to try them. A half-open
+        backend takes one trial call (probe) at a time, while it is in flight
+        other calls only try that backend after all the others.
+        """
+        deferred = []
+        for name, client, model in self._route():
+            with self._lock:
+                health = self.health[name]
+                probe = health.state() == HALF_OPEN
+                if probe and health.probing:
+                    deferred.append((name, client, model))
+                    continue
+                health.probing = health.probing or probe
+            yield name, client, model, probe
+        for name, client, model in deferred:
+            yield name, client, model, False
+
+    def _end_probe(self, name):
+        with self._lock:
+            self.health[name].probing = False
+
+    def _record(self, name, latency, error, failover=False):
+        with self._lock:
+            health = self.health[name]
+            was_open = health.opened_at is not None
+            health.record(latency, error is None)
+            # Calls answered by another backend than the first choice
+            self.failovers += failover
+            if error is not None:
+                if not was_open and health.opened_at is not None:
+                    logger.warning("LLM backend %s circuit opened: %s", name, error)
+            elif was_open:
+                logger.info("LLM backend %s recovered", name)
+
+    @staticmethod
+    def _request(kwargs, model):
+        return dict(kwargs, model=model) if model else kwargs
+
+
+def parse_backends(config: Optional[str] = ROUTER_BACKENDS) -> List[Dict]:
+    """Backend specs from LLM_ROUTER_BACKENDS (a JSON list of objects with at least "provider")"""
+    if not config:
+        raise ValueError("The router provider needs backends, set LLM_ROUTER_BACKENDS or pass backends=[...]")
+    specs = json.loads(config)
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) and "provider" in spec for spec in specs):
+        raise ValueError("LLM_ROUTER_BACKENDS must be a JSON list of objects with a provider")
+    return specs
@@ -0,0 +1,14 @@
+import re
+
+# Currency symbols and names next to a price
+CURRENCY = r"(?:€|EUR(?:O)?\b|\$|£)"
+
+# A price with cents or ",-", e.g. "8,50", "€ 8.50" or "12,- EUR"
+PRICE = rf"(?:[€$£]\s*)?\d{{1,4}}(?:[.,]\d{{2}}|,-)(?:\s*{CURRENCY})?"
+PRICE_PATTERN = re.compile(PRICE, re.IGNORECASE)
+
+# A line holding nothing but a price, which may also lack the cents ("8", "8,5 €")
+PRICE_ONLY_PATTERN = re.compile(rf"^\s*(?:[€$£]\s*)?\d{{1,4}}(?:[.,]\d{{1,2}}|,-)?\s*{CURRENCY}?\s*$", re.IGNORECASE)
+
+# Leader dots/dashes between a name and its price
+LEADER_PATTERN = re.compile(r"(?:\s*[._·…‥-]){3,}\s*")
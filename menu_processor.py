@@ -1,39 +1,498 @@
 import csv 
+import json
 import re  
-from typing import List, Dict, Optional
-from extract_text import extract_text
-from llm_clients.factory import get_llm_client
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Union
+from extract_text import iter_text_pages, normalize_input
+from chunking import PRICE_PATTERN, iter_menu_chunks
+from item_merge import ChunkItemMerger
+from json_stream import JSONItemStreamParser
+from line_parser import MAX_NAME_CHARS, MAX_PRICE_CENTS, MIN_PRICE_CENTS, MenuLineParser, price_cents
+from token_budget import ChunkBudget, chunk_budget, get_token_counter
+from llm_clients import OUTPUT_MODES
+from llm_clients.factory import get_llm_client, get_shared_llm_client
+from result_cache import ResultCache
 import os      
 
+# Bump whenever _build_prompt, the chunking or the line parser changes so cached results are not reused
+PROMPT_VERSION = "6"
+
+# Item fields the LLM returns, as consumed by generate_csv, with their JSON schema
+MENU_ITEM_FIELDS = {
+    "name": {"type": "string", "description": "Max 20 characters, size prefix for items sold in several sizes"},
+    "quantity": {"type": "integer"},
+    "price": {"type": "integer", "description": "Price in cents"},
+    "warengruppe": {"type": "string"},
+    "hauptgruppe": {"type": "string", "enum": ["KÜCHE", "THEKE"]},
+    "steuersatz": {"type": "integer", "enum": [7, 19]},
+    "ordergruppe": {"type": "string", "enum": ["KÜCHE WARM", "THEKE"]},
+    "ausser_haus": {"type": "integer", "enum": [0, 1]},
+}
+
+# Fields every extracted item must have (quantity defaults to 1)
+REQUIRED_FIELDS = {field for field in MENU_ITEM_FIELDS if field != "quantity"}
+
+MENU_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": MENU_ITEM_FIELDS,
+    # Strict schemas need every property listed as required
+    "required": list(MENU_ITEM_FIELDS),
+    "additionalProperties": False,
+}
+
+# Structured modes return an object, the items are wrapped in it
+MENU_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {"items": {"type": "array", "items": MENU_ITEM_SCHEMA}},
+    "required": ["items"],
+    "additionalProperties": False,
+}
+
+# json_schema | json_object | function | text, auto picks the best mode the model supports
+OUTPUT_MODE = os.getenv("LLM_OUTPUT_MODE", "auto")
+
+# Maximum number of chunk requests in flight at once
+MAX_CONCURRENT_CHUNKS = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Optional cap on the menu text per LLM call in tokens, by default chunks are sized from the model's limits
+MAX_CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "0")) or None
+
+# Lines the next chunk repeats when a section is split, duplicates are merged afterwards
+CHUNK_OVERLAP_LINES = int(os.getenv("CHUNK_OVERLAP_LINES", "2"))
+
+# Simple "name size price" lines are parsed without the LLM unless this is 0
+RULE_BASED_PARSING = os.getenv("RULE_BASED_PARSING", "1") != "0"
+
+# Cheaper model every chunk goes to first, only chunks whose output fails validation go to the main model (off when unset)
+CASCADE_MODEL = os.getenv("LLM_CASCADE_MODEL") or None
+
+# Items a cascade answer must have per price in the chunk, fewer means items were missed
+MIN_ITEMS_PER_PRICE = 0.5
+
+# Tax rate and order group that go with each main group, see _build_prompt
+GROUP_FIELDS = {"KÜCHE": (7, "KÜCHE WARM"), "THEKE": (19, "THEKE")}
+
 class MenuProcessor:
-    def __init__(self, llm_provider: str = 'openai', api_key: Optional[str] = None):
-        self.llm = get_llm_client(provider=llm_provider, api_key=api_key)
+    def __init__(self, llm_provider: str = 'openai', api_key: Optional[str] = None,
+                 model: str = "gpt-4", cache: Optional[ResultCache] = None,
+                 max_concurrency: int = MAX_CONCURRENT_CHUNKS,
+                 chunk_tokens: Optional[int] = MAX_CHUNK_TOKENS,
+                 output_mode: str = OUTPUT_MODE,
+                 rule_based: bool = RULE_BASED_PARSING,
+                 overlap_lines: int = CHUNK_OVERLAP_LINES,
+                 llm_options: Optional[Dict] = None, shared_client: bool = True,
+                 cascade_model: Optional[str] = CASCADE_MODEL):
+        # llm_options go to the client, e.g. the recording and latency settings of the replay provider.
+        # The client and its connection pool are shared by every processor in the process unless shared_client is False
+        make_client = get_shared_llm_client if shared_client else get_llm_client
+        self.llm = make_client(provider=llm_provider, api_key=api_key, **(llm_options or {}))
+        self.model = model
+        self.cache = cache
+        self.max_concurrency = max(1, max_concurrency)
+        self.chunk_tokens = chunk_tokens
+        self.rule_based = rule_based
+        self.overlap_lines = max(0, overlap_lines)
+        self.cascade_model = cascade_model if cascade_model != model else None
+        # Chunks that failed in the last run: [{"chunk": index, "error": message}]
+        self.last_errors: List[Dict] = []
+        # LLM calls and input tokens of the last run
+        self.last_report: Dict = {}
+
+        # Context size, streaming and structured output support of the client for this model
+        self.capabilities = self.llm.get_capabilities(model)
+        if self.cascade_model and self.capabilities.fixed_model:
+            # Both steps of the cascade would go to the same backend model
+            warnings.warn(f"Model cascade with {self.cascade_model} disabled: the LLM client replaces the "
+                          f"requested model (router backends with a model)")
+            self.cascade_model = None
+        self.cascade_capabilities = self.llm.get_capabilities(self.cascade_model) if self.cascade_model else None
+        if output_mode == "auto":
+            output_mode = self.capabilities.output_mode
+            if self.cascade_capabilities is not None:
+                # One prompt for both models of the cascade, in the most constrained mode both support
+                output_mode = max(output_mode, self.cascade_capabilities.output_mode, key=OUTPUT_MODES.index)
+        self.output_mode = output_mode
+        # Parse outcomes per output mode, see parse_failure_rates
+        self.parse_stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
         
     def process_menu_file(self, file, filename: Optional[str] = None) -> List[Dict]:
-        """Process menu file in chunks to handle large files"""
-        # Extract text
-        raw_text = extract_text(file, filename=filename)
-        if not raw_text.strip():
-            raise ValueError("No text could be extracted from the uploaded file.")
-        
-        # Split text into chunks if too long (approx 2000 chars per chunk)
-        chunks = [raw_text[i:i+2000] for i in range(0, len(raw_text), 2000)]
+        """
+        Process menu file in chunks to handle large files.
+        file can be a path, bytes, a memory map or a file-like object.
+        """
+        return list(self.iter_menu_items(file, filename, stream=False))
+
+    def iter_menu_items(self, file, filename: Optional[str] = None, stream: bool = True) -> Iterator[Dict]:
+        """
+        Yield menu items in menu order while the file is still being processed.
+        With stream=True every item is yielded as soon as the LLM has finished
+        writing it. Time to the first item, and to the first item the LLM
+        extracted, is recorded in last_report.
+        """
+        start = time.perf_counter()
+        source, ext = normalize_input(file, filename)
+        filename = filename or (f"upload{ext}" if ext else None)
+        self.last_errors = []
+        self.last_report = {"chunks": 0, "input_tokens": 0, "items": 0, "rule_based_items": 0,
+                            "rule_based_share": None, "overlap_duplicates": 0, "cascade_chunks": 0,
+                            "escalated_chunks": 0, "escalation_rate": None, "escalation_reasons": {},
+                            "model_seconds": {}, "time_to_first_item": None, "time_to_first_llm_item": None,
+                            "seconds": None, "cached": False}
+
+        # Re-uploads of the same file skip extraction and all LLM calls
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache_key(source)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.last_report.update(cached=True, items=len(cached), seconds=time.perf_counter() - start,
+                                        time_to_first_item=time.perf_counter() - start if cached else None)
+                yield from cached
+                return
+
+        # Extract text page by page, chunks are sent to the LLM while later pages are still being extracted
+        pages = iter_text_pages(source, filename=filename)
         all_items = []
-        
-        # Process each chunk
-        for chunk in chunks:
-            try:
-                prompt = self._build_prompt(chunk)
-                response_text = self.llm.generate_text(prompt=prompt)
-                items = self._parse_llm_response(response_text)
-                all_items.extend(items)
-            except Exception as e:
-                st.warning(f"Warning: Some items might not be processed correctly: {str(e)}")
+        chunk_count = 0
+
+        # Process chunks concurrently, items arrive in chunk order
+        for index, items, error, done in self._dispatch_chunks(self._iter_work(pages), stream, start):
+            for item in items:
+                if self.last_report["time_to_first_item"] is None:
+                    self.last_report["time_to_first_item"] = time.perf_counter() - start
+                all_items.append(item)
+                self.last_report["items"] += 1
+                yield item
+            if not done:
                 continue
-        
-        return all_items
+            chunk_count += 1
+            if error is not None:
+                self.last_errors.append({"chunk": index, "error": str(error)})
+                warnings.warn(f"Warning: Some items might not be processed correctly (chunk {index + 1}): {str(error)}")
+
+        self.last_report["seconds"] = time.perf_counter() - start
+        if self.last_report["items"]:
+            self.last_report["rule_based_share"] = self.last_report["rule_based_items"] / self.last_report["items"]
+        if self.last_report["cascade_chunks"]:
+            self.last_report["escalation_rate"] = self.last_report["escalated_chunks"] / self.last_report["cascade_chunks"]
+        if not chunk_count:
+            raise ValueError("No text could be extracted from the uploaded file.")
+
+        # Only complete results are cached, partial ones would hide the failure
+        if cache_key is not None and not self.last_errors:
+            self.cache.set(cache_key, all_items) # type: ignore
+
+    def iter_batch_requests(self, file, filename: Optional[str] = None) -> Iterator[Dict]:
+        """
+        The work for a file in a batch job, in menu order, without calling the
+        LLM: {"body": chat-completion request, "overlap_items": n} per chunk of
+        text, {"items": [...]} for the items the line parser resolved. Requests
+        go to self.model, a model cascade only applies to interactive runs.
+        Parse the responses with parse_batch_response. last_report is not touched.
+        """
+        source, ext = normalize_input(file, filename)
+        filename = filename or (f"upload{ext}" if ext else None)
+        report = {"chunks": 0, "input_tokens": 0, "rule_based_items": 0}
+        for work in self._iter_work(iter_text_pages(source, filename=filename), report):
+            if isinstance(work, list):
+                yield {"items": work}
+                continue
+            body = {"model": self.model, "messages": [{"role": "user", "content": self._build_prompt(work)}],
+                    **self._output_params()}
+            yield {"body": body, "overlap_items": getattr(work, "overlap_items", 0)}
+
+    def parse_batch_response(self, response_text: str, output_mode: str) -> List[Dict]:
+        """Items of the response to a batch request prepared in output_mode, see iter_batch_requests"""
+        return self._parse_response(response_text, output_mode)
+
+    def _dispatch_chunks(self, chunks: Iterable[Union[str, List[Dict]]], stream: bool = False,
+                         start: Optional[float] = None) -> Iterator[Tuple[int, List[Dict], Optional[Exception], bool]]:
+        """
+        Send chunks to the LLM with at most max_concurrency requests in flight.
+        Chunks that are already lists of items (from the line parser) pass straight through.
+        Items a text chunk repeats from the overlap with the previous text chunk are dropped.
+        Yields (chunk_index, items, error, done) in chunk order: items of later
+        chunks are held back until every earlier chunk is done, and done is True
+        once for every chunk, together with its error if it failed. The time
+        from start to the first item of a text chunk goes to last_report.
+        """
+        start = time.perf_counter() if start is None else start
+        events: "queue.Queue" = queue.Queue()
+        chunks = iter(chunks)
+        submitted = 0
+        in_flight = 0
+        exhausted = False
+        next_index = 0
+        held: Dict[int, List[Dict]] = {}
+        finished: Dict[int, Optional[Exception]] = {}
+        # Text chunks are merged in release order, parsed lists in between do not break adjacency
+        merger = ChunkItemMerger()
+        parsed: set = set()
+        # Items each text chunk repeats from the previous one, see chunking.MenuChunk
+        overlaps: Dict[int, int] = {}
+
+        def release(index, items):
+            if index in parsed:
+                return items
+            kept = merger.merge(index, items, overlaps.get(index, 0))
+            self.last_report["overlap_duplicates"] = merger.duplicates
+            if kept and self.last_report.get("time_to_first_llm_item") is None:
+                self.last_report["time_to_first_llm_item"] = time.perf_counter() - start
+            return kept
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            while True:
+                # Keep the window full, the chunk iterator also drives text extraction
+                while not exhausted and in_flight < self.max_concurrency:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    if isinstance(chunk, list):
+                        parsed.add(submitted)
+                        events.put((submitted, chunk, None, False))
+                        events.put((submitted, [], None, True))
+                    else:
+                        overlaps[submitted] = getattr(chunk, "overlap_items", 0)
+                        executor.submit(self._run_chunk, submitted, chunk, stream, events)
+                    submitted += 1
+                    in_flight += 1
+                if next_index >= submitted and exhausted:
+                    return
+
+                index, items, error, done = events.get()
+                if done:
+                    in_flight -= 1
+                    finished[index] = error
+                if index == next_index:
+                    items = release(index, items)
+                    if items:
+                        yield index, items, None, False
+                else:
+                    held.setdefault(index, []).extend(items)
+
+                # Release finished chunks in order, with whatever the next one has produced so far
+                while next_index in finished:
+                    yield next_index, [], finished.pop(next_index), True
+                    next_index += 1
+                    # A chunk that has not been submitted yet is released with its first items instead
+                    if next_index in held:
+                        items = release(next_index, held.pop(next_index))
+                        if items:
+                            yield next_index, items, None, False
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_chunk(self, index: int, chunk: str, stream: bool, events: "queue.Queue") -> None:
+        """Worker: put (index, items, None, False) events for the items of a chunk, then (index, [], error, True)"""
+        if not stream:
+            items, error = self._process_chunk(chunk)
+            events.put((index, items, None, False))
+            events.put((index, [], error, True))
+            return
+        try:
+            for items in self._stream_chunk(chunk):
+                events.put((index, items, None, False))
+        except Exception as e:
+            events.put((index, [], e, True))
+        else:
+            events.put((index, [], None, True))
+
+    def _process_chunk(self, chunk: str) -> Tuple[List[Dict], Optional[Exception]]:
+        """Run one chunk through the LLM, returning (items, error) instead of raising"""
+        try:
+            items = self._cascade_chunk(chunk)
+            if items is not None:
+                return items, None
+            prompt = self._build_prompt(chunk)
+            response_text = self._generate(prompt, self.model)
+            return self._parse_response(response_text), None
+        except Exception as e:
+            return [], e
+
+    def _stream_chunk(self, chunk: str) -> Iterator[List[Dict]]:
+        """Stream one chunk through the LLM and yield its items as soon as their JSON objects close"""
+        # The cascade model's items are only used once all of them are validated
+        items = self._cascade_chunk(chunk)
+        if items is not None:
+            yield items
+            return
+        prompt = self._build_prompt(chunk)
+        if not self.capabilities.streaming:
+            yield self._parse_response(self._generate(prompt, self.model))
+            return
+
+        parser = JSONItemStreamParser()
+        parts = []
+        dropped = 0
+        start = time.perf_counter()
+        for piece in self.llm.stream_text(prompt=prompt, model=self.model, **self._output_params()):
+            parts.append(piece)
+            objects = parser.feed(piece)
+            items = [item for item in objects if all(field in item for field in REQUIRED_FIELDS)]
+            dropped += len(objects) - len(items)
+            if items:
+                yield items
+        self._record_model_time(self.model, time.perf_counter() - start)
+
+        if parser.items_emitted and not parser.invalid_objects:
+            self._record_parse(items=parser.items_emitted - dropped, dropped_items=dropped)
+        elif parser.items_emitted:
+            # Some objects were malformed, the ones already shown are kept
+            self._record_parse(items=parser.items_emitted - dropped, dropped_items=dropped + parser.invalid_objects,
+                               partial=1)
+        else:
+            # Nothing usable came out incrementally, fall back to the repairing parser
+            yield self._parse_response("".join(parts))
+
+    def _cascade_chunk(self, chunk: str) -> Optional[List[Dict]]:
+        """
+        Items of the chunk from the cascade model, or None when there is no
+        cascade or its answer failed (request error, unparseable or invalid
+        output) and the chunk has to go to the main model.
+        """
+        if not self.cascade_model:
+            return None
+        with self._stats_lock:
+            self.last_report["cascade_chunks"] = self.last_report.get("cascade_chunks", 0) + 1
+        try:
+            items = self._parse_response(self._generate(self._build_prompt(chunk), self.cascade_model))
+            reason = self._validate_items(items, chunk)
+        except Exception as e:
+            reason = f"error: {type(e).__name__}"
+        if reason is None:
+            return items
+        with self._stats_lock:
+            self.last_report["escalated_chunks"] = self.last_report.get("escalated_chunks", 0) + 1
+            reasons = self.last_report.setdefault("escalation_reasons", {})
+            reasons[reason] = reasons.get(reason, 0) + 1
+        return None
+
+    def _validate_items(self, items: List[Dict], chunk: str) -> Optional[str]:
+        """
+        Why a chunk's items cannot be trusted, or None when they pass: the required
+        fields of _parse_llm_response, prices in cents within a plausible range
+        that occur in the chunk, names within the 20 characters of the prompt,
+        main group, tax rate and order group that match, and no fewer items
+        than the chunk's prices suggest.
+        """
+        chunk_prices = [price_cents(match) for match in PRICE_PATTERN.findall(chunk)]
+        if not items:
+            return "no items" if chunk_prices else None
+        if len(items) < len(chunk_prices) * MIN_ITEMS_PER_PRICE:
+            return "missing items"
+        known_prices = set(chunk_prices)
+        for item in items:
+            if not all(field in item for field in REQUIRED_FIELDS):
+                return "missing fields"
+            price = _as_int(item["price"])
+            if price is None or not MIN_PRICE_CENTS <= price <= MAX_PRICE_CENTS:
+                return "implausible price"
+            if known_prices and price not in known_prices:
+                # Euros instead of cents, or a price from another line
+                return "price not in text"
+            name = item["name"]
+            if not isinstance(name, str) or not name.strip() or len(name) > MAX_NAME_CHARS:
+                return "bad name"
+            if GROUP_FIELDS.get(item["hauptgruppe"]) != (_as_int(item["steuersatz"]), item["ordergruppe"]):
+                return "inconsistent groups"
+        return None
+
+    def _generate(self, prompt: str, model: str) -> str:
+        start = time.perf_counter()
+        try:
+            return self.llm.generate_text(prompt=prompt, model=model, **self._output_params())
+        finally:
+            self._record_model_time(model, time.perf_counter() - start)
+
+    def _record_model_time(self, model: str, seconds: float) -> None:
+        """LLM seconds per model of the current run, summed over concurrent calls"""
+        with self._stats_lock:
+            model_seconds = self.last_report.setdefault("model_seconds", {})
+            model_seconds[model] = model_seconds.get(model, 0.0) + seconds
+
+    def _iter_work(self, pages: Iterable[Tuple[int, str, str]],
+                   report: Optional[Dict] = None) -> Iterator[Union[str, List[Dict]]]:
+        """
+        Chunks of menu text for the LLM, interleaved in menu order with lists
+        of items the line parser resolved on its own. Only the lines it could
+        not parse (and the section headers, for context) are sent to the LLM.
+        Chunks, input tokens and parsed items are counted in report (last_report by default).
+        """
+        report = self.last_report if report is None else report
+        texts = (text for _, text, _ in pages)
+        if not self.rule_based:
+            yield from self._iter_chunks(texts, report)
+            return
+
+        segments = MenuLineParser().iter_segments(texts)
+        held: List[List[Dict]] = []
+
+        def texts_until_items():
+            # The chunk being built is cut before parsed items, so they keep their place in the menu
+            for segment in segments:
+                if isinstance(segment, list):
+                    held.append(segment)
+                    return
+                yield segment
+
+        while True:
+            yield from self._iter_chunks(texts_until_items(), report)
+            if not held:
+                return
+            items = held.pop()
+            report["rule_based_items"] += len(items)
+            yield items
+
+    def _iter_chunks(self, texts: Iterable[str], report: Dict) -> Iterator[str]:
+        """Split streamed menu text into chunks at line and section boundaries, sized for the model"""
+        count_tokens = get_token_counter(self.model)
+        prompt_tokens = count_tokens(self._build_prompt(""))
+        budget = self.chunk_budget(prompt_tokens)
+        for chunk in iter_menu_chunks(texts, budget, count_tokens, overlap_lines=self.overlap_lines):
+            report["chunks"] += 1
+            report["input_tokens"] += prompt_tokens + count_tokens(chunk)
+            yield chunk
+
+    def chunk_budget(self, prompt_tokens: Optional[int] = None) -> ChunkBudget:
+        """Token budget per chunk for the configured model and the static prompt"""
+        if prompt_tokens is None:
+            prompt_tokens = get_token_counter(self.model)(self._build_prompt(""))
+        limits = (self.capabilities.max_context_tokens, self.capabilities.max_output_tokens)
+        if self.cascade_capabilities is not None:
+            # Chunks have to fit both models of the cascade
+            limits = (min(limits[0], self.cascade_capabilities.max_context_tokens),
+                      min(limits[1], self.cascade_capabilities.max_output_tokens))
+        return chunk_budget(self.model, prompt_tokens, max_input_tokens=self.chunk_tokens, limits=limits)
+
+    def cache_key(self, source) -> str:
+        """
+        Cache key for a file (bytes-like or path) under the current prompt
+        version, output mode, chunking and line parser settings and model
+        """
+        model = f"{self.cascade_model}>{self.model}" if self.cascade_model else self.model
+        version = (f"{PROMPT_VERSION}:{self.output_mode}:rules={int(self.rule_based)}"
+                   f":overlap={self.overlap_lines}:chunk={self.chunk_tokens or 'auto'}")
+        return ResultCache.make_key(source, version, model)
+
+    def invalidate_cached(self, file) -> bool:
+        """Drop the cached result for a file so the next run reprocesses it"""
+        if self.cache is None:
+            return False
+        source, _ = normalize_input(file)
+        return self.cache.invalidate(self.cache_key(source))
     
     def _build_prompt(self, menu_text: str) -> str:
+        if self.output_mode == "text":
+            output_format = "Output ONLY a JSON array of objects with these keys:"
+        else:
+            output_format = 'Output ONLY a JSON object {"items": [...]} where every item has these keys:'
         prompt = f"""
         You are a restaurant menu parser.
 
@@ -52,7 +511,7 @@ class MenuProcessor:
 
         Additionally, correct any German grammatical mistakes in the item names and output data automatically.
 
-        Output ONLY a JSON array of objects with these keys:
+        {output_format}
         name, quantity, price, warengruppe, hauptgruppe, steuersatz, ordergruppe, ausser_haus
 
         Make sure ALL data from the menu is included — no item, size, or price should be missed.
@@ -69,9 +528,68 @@ class MenuProcessor:
 
 
     
+    def _output_params(self) -> Dict:
+        """Request parameters for the configured output mode"""
+        if self.output_mode == "text":
+            return {}
+        return self.llm.structured_output_params(MENU_RESPONSE_SCHEMA, "menu_items", self.output_mode)
+
+    def _parse_response(self, response_text: str, output_mode: Optional[str] = None) -> List[Dict]:
+        """
+        Parse an LLM response to a request in output_mode (the configured mode
+        by default). Structured output is loaded as plain JSON, with the
+        incremental item parser and then the regex repair as fallbacks.
+        Text mode only has the regex repair. Outcomes are counted per output mode.
+        """
+        output_mode = output_mode or self.output_mode
+        if output_mode != "text":
+            try:
+                data = json.loads(response_text)
+            except ValueError:
+                data = None
+            items = data.get("items") if isinstance(data, dict) else data
+            if isinstance(items, list):
+                valid = [item for item in items if isinstance(item, dict) and all(field in item for field in REQUIRED_FIELDS)]
+                self._record_parse(output_mode, items=len(valid), dropped_items=len(items) - len(valid))
+                return valid
+
+            # Truncated or wrapped in prose: keep every complete item object
+            objects = JSONItemStreamParser().feed(response_text)
+            if objects:
+                valid = [item for item in objects if all(field in item for field in REQUIRED_FIELDS)]
+                self._record_parse(output_mode, items=len(valid), dropped_items=len(objects) - len(valid), fallbacks=1)
+                return valid
+
+        try:
+            items = self._parse_llm_response(response_text)
+        except RuntimeError:
+            self._record_parse(output_mode, failures=1, fallbacks=int(output_mode != "text"))
+            raise
+        self._record_parse(output_mode, items=len(items), fallbacks=int(output_mode != "text"))
+        return items
+
+    def _record_parse(self, output_mode: Optional[str] = None, **counts):
+        with self._stats_lock:
+            stats = self.parse_stats.setdefault(output_mode or self.output_mode, {
+                "responses": 0, "failures": 0, "fallbacks": 0, "partial": 0, "items": 0, "dropped_items": 0})
+            stats["responses"] += 1
+            for key, value in counts.items():
+                stats[key] += value
+
+    def parse_failure_rates(self) -> Dict[str, Dict[str, float]]:
+        """Share of responses per output mode that could not be parsed, or needed the repairing fallback"""
+        with self._stats_lock:
+            return {
+                mode: {
+                    "failure_rate": stats["failures"] / stats["responses"],
+                    "fallback_rate": stats["fallbacks"] / stats["responses"],
+                    "dropped_item_rate": stats["dropped_items"] / max(1, stats["items"] + stats["dropped_items"]),
+                }
+                for mode, stats in self.parse_stats.items() if stats["responses"]
+            }
+
     def _parse_llm_response(self, response_text: str) -> List[Dict]:
         """Parse LLM response with improved error handling and JSON cleaning"""
-        import json
         try:
             # Clean and normalize the response text
             cleaned = response_text.strip()
@@ -100,8 +618,7 @@ class MenuProcessor:
                 raise ValueError("LLM response is not a list")
                 
             # Validate each item has required fields
-            required_fields = {'name', 'price', 'warengruppe', 'hauptgruppe', 'steuersatz', 'ordergruppe', 'ausser_haus'}
-            items = [item for item in items if all(field in item for field in required_fields)]
+            items = [item for item in items if all(field in item for field in REQUIRED_FIELDS)]
             
             return items
         
@@ -176,4 +693,13 @@ class MenuProcessor:
         csv_content = output.getvalue()
         output.close()
 
-        return csv_content
\ No newline at end of file
+        return csv_content
+
+
+def _as_int(value) -> Optional[int]:
+    """Whole numbers as the LLM writes them (720 or "720"), None for anything else ("7.20", True)"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
@@ -0,0 +1,142 @@
+import os
+from PIL import Image, ImageOps
+
+# Resolution tesseract works best at, used for PDF rendering and DPI-tagged images
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+
+# Images above this pixel count are scaled down before OCR (12 MP phone photos)
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", "8000000"))
+
+# Never enlarge an image by more than this factor
+MAX_UPSCALE = 4.0
+
+# Pipeline switches
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "1") == "1"
+OCR_DESKEW = os.getenv("OCR_DESKEW", "1") == "1"
+
+# Deskew search range and resolution in degrees
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+DESKEW_MIN_ANGLE = 0.3
+
+# Deskew is measured on a thumbnail of this width
+DESKEW_THUMB_WIDTH = 600
+
+
+def preprocess_for_ocr(img, dpi=None, max_pixels=None, binarize=None, deskew=None):
+    """
+    Normalize an image before it is passed to tesseract:
+    fix EXIF orientation, rescale to the target DPI / pixel budget,
+    convert to grayscale, binarize and deskew.
+    """
+    max_pixels = OCR_MAX_PIXELS if max_pixels is None else max_pixels
+    binarize = OCR_BINARIZE if binarize is None else binarize
+    deskew = OCR_DESKEW if deskew is None else deskew
+
+    # Phone photos are often stored sideways with an EXIF rotation tag
+    img = ImageOps.exif_transpose(img)
+
+    img = rescale_for_ocr(img, dpi=dpi, max_pixels=max_pixels)
+
+    if img.mode != "L":
+        img = img.convert("L")
+
+    if binarize:
+        threshold = otsu_threshold(img)
+        img = img.point(lambda p: 255 if p > threshold else 0)
+
+    if deskew:
+        angle = estimate_skew(img)
+        if abs(angle) >= DESKEW_MIN_ANGLE:
+            img = img.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    return img
+
+
+def rescale_for_ocr(img, dpi=None, max_pixels=OCR_MAX_PIXELS):
+    """Scale an image towards OCR_DPI when its resolution is known, capped by max_pixels"""
+    width, height = img.size
+    scale = 1.0
+
+    # Only trust a DPI tag when it is below the target, upscaling low resolution scans
+    source_dpi = dpi or _image_dpi(img)
+    if source_dpi and source_dpi < OCR_DPI:
+        scale = min(OCR_DPI / source_dpi, MAX_UPSCALE)
+
+    if max_pixels and width * height * scale * scale > max_pixels:
+        scale = (max_pixels / float(width * height)) ** 0.5
+
+    if abs(scale - 1.0) < 0.05:
+        return img
+    new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    resample = Image.LANCZOS if scale < 1 else Image.BICUBIC
+    return img.resize(new_size, resample=resample)
+
+
+def otsu_threshold(img):
+    """Global Otsu threshold of a grayscale image, computed from its histogram"""
+    histogram = img.histogram()[:256]
+    total = sum(histogram)
+    if not total:
+        return 127
+
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+    sum_background = 0.0
+    weight_background = 0
+    best_threshold, best_variance = 127, -1.0
+    for i, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += i * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = i
+    return best_threshold
+
+
+def estimate_skew(img):
+    """
+    Estimate the text skew angle in degrees using a projection profile.
+    Text lines produce the sharpest row profile when they are horizontal.
+    """
+    thumb = img
+    if img.width > DESKEW_THUMB_WIDTH:
+        height = max(1, int(img.height * DESKEW_THUMB_WIDTH / img.width))
+        thumb = img.resize((DESKEW_THUMB_WIDTH, height), resample=Image.BILINEAR)
+    # Dark text on white background becomes white on black so rotation padding stays neutral
+    thumb = ImageOps.invert(thumb.convert("L"))
+
+    # Angles are tried from 0 outwards so ties (e.g. blank pages) keep the image as is
+    best_angle, best_score = 0.0, -1.0
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    for i in sorted(range(-steps, steps + 1), key=abs):
+        angle = i * DESKEW_STEP
+        score = _profile_sharpness(thumb.rotate(angle, resample=Image.BILINEAR, expand=False, fillcolor=0))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def _profile_sharpness(img):
+    # Resizing to one column averages every row in C
+    rows = list(img.resize((1, img.height), resample=Image.BOX).getdata())
+    return sum((rows[j + 1] - rows[j]) ** 2 for j in range(len(rows) - 1))
+
+
+def _image_dpi(img):
+    dpi = img.info.get("dpi")
+    if not dpi:
+        return None
+    try:
+        value = float(dpi[0])
+    except (TypeError, ValueError, IndexError):
+        return None
+    # Many encoders write a meaningless 1, 72 or 96 dpi default tag
+    return None if value <= 1 or value in (72, 96) else value
@@ -0,0 +1,194 @@
+import re
+
+from menu_patterns import LEADER_PATTERN, PRICE_ONLY_PATTERN
+
+# Spans smaller than this (in points) are footnote markers, watermarks or ornaments
+MIN_FONT_SIZE = 4.0
+
+# Lines wider than this fraction of the page are not used to find columns
+SPANNING_LINE_WIDTH = 0.6
+
+# Horizontal gaps narrower than this (in points) do not separate columns
+MIN_COLUMN_GAP = 12.0
+
+# A column where at least this share of lines are prices belongs to the column on its left
+PRICE_COLUMN_SHARE = 0.8
+
+# Fonts that only contain symbols and decorations
+DECORATIVE_FONTS = ("dingbat", "wingding", "symbol", "webding", "ornament")
+
+# Lines made only of punctuation and symbols (rules, separators, ornaments)
+DECORATION_PATTERN = re.compile(r"^[\W_]+$")
+
+
+def extract_page_layout_text(page) -> str:
+    """
+    Rebuild the reading order of a PDF page from PyMuPDF's block/line/span output.
+
+    Columns are read left to right and top to bottom, lines spanning several
+    columns (titles, section headers) split the page into bands, and text on
+    the same baseline within a column (an item name and its price) is kept on
+    one line. Rotated, tiny and purely decorative text is dropped.
+    """
+    lines = _collect_lines(page)
+    if not lines:
+        return ""
+
+    columns = _find_columns(lines, page.rect.width)
+    spanning, column_lines = _assign_columns(lines, columns)
+
+    # Spanning lines split the page into horizontal bands read one after another
+    output = []
+    band_top = float("-inf")
+    for boundary in sorted(spanning, key=lambda l: l["y0"]) + [None]:
+        band_bottom = boundary["y0"] if boundary else float("inf")
+        for col in column_lines:
+            band = [l for l in col if band_top <= _center_y(l) < band_bottom]
+            if band:
+                output.extend(_build_rows(band))
+                output.append("")
+        if boundary:
+            output.append(boundary["text"])
+            band_top = boundary["y1"]
+
+    text = "\n".join(output)
+    return re.sub(r"\n{3,}", "\n\n", text).strip() + "\n"
+
+
+def _collect_lines(page):
+    """Horizontal, non-decorative text lines with their bounding boxes"""
+    lines = []
+    page_rect = page.rect
+    data = page.get_text("dict")
+    for block in data.get("blocks", []):
+        if block.get("type") != 0:
+            continue
+        for line in block.get("lines", []):
+            # Rotated or vertical text is decoration on menus
+            dx, dy = line.get("dir", (1, 0))
+            if dx < 0.99 or abs(dy) > 0.1:
+                continue
+            spans = []
+            for span in line.get("spans", []):
+                text = span.get("text", "")
+                if not text.strip():
+                    continue
+                if span.get("size", 0) < MIN_FONT_SIZE:
+                    continue
+                if any(name in span.get("font", "").lower() for name in DECORATIVE_FONTS):
+                    continue
+                x0, y0, x1, y1 = span["bbox"]
+                # Text placed outside the visible page
+                if x1 < page_rect.x0 or x0 > page_rect.x1 or y1 < page_rect.y0 or y0 > page_rect.y1:
+                    continue
+                spans.append((x0, y0, x1, y1, text))
+            if not spans:
+                continue
+
+            text = " ".join(s[4].strip() for s in sorted(spans, key=lambda s: s[0]))
+            text = LEADER_PATTERN.sub(" ", text).strip()
+            if not text or DECORATION_PATTERN.match(text):
+                continue
+            lines.append({
+                "x0": min(s[0] for s in spans),
+                "y0": min(s[1] for s in spans),
+                "x1": max(s[2] for s in spans),
+                "y1": max(s[3] for s in spans),
+                "text": text,
+            })
+    return lines
+
+
+def _find_columns(lines, page_width):
+    """
+    Column x-ranges from a horizontal coverage profile of the narrower lines.
+    A gutter is a run of at least MIN_COLUMN_GAP points crossed by at most one
+    line, so a centred title does not glue two columns together.
+    """
+    narrow = [l for l in lines if l["x1"] - l["x0"] < SPANNING_LINE_WIDTH * page_width] or lines
+    left = int(min(l["x0"] for l in narrow))
+    right = int(max(l["x1"] for l in narrow)) + 1
+
+    coverage = [0] * (right - left)
+    for l in narrow:
+        for x in range(int(l["x0"]) - left, int(l["x1"]) - left):
+            coverage[x] += 1
+
+    max_crossing = 1 if len(narrow) >= 6 else 0
+    columns = []
+    start = None
+    gap = 0
+    for x, count in enumerate(coverage + [0] * int(MIN_COLUMN_GAP + 1)):
+        if count > max_crossing:
+            if start is None:
+                start = x
+            gap = 0
+        elif start is not None:
+            gap += 1
+            if gap >= MIN_COLUMN_GAP:
+                columns.append([left + start, left + x - gap + 1])
+                start = None
+                gap = 0
+    if not columns:
+        return [[left, right]]
+
+    # Columns need at least two lines of their own, otherwise they are part of their neighbour
+    def inside(col):
+        return [l for l in narrow if l["x0"] >= col[0] - 1 and l["x1"] <= col[1] + 1]
+
+    merged = [columns[0]]
+    for col in columns[1:]:
+        lines_inside = inside(col)
+        prices = sum(1 for l in lines_inside if PRICE_ONLY_PATTERN.match(l["text"]))
+        # A right-aligned price column belongs to the item names on its left
+        if len(lines_inside) < 2 or prices >= PRICE_COLUMN_SHARE * len(lines_inside):
+            merged[-1][1] = col[1]
+        else:
+            merged.append(col)
+    if len(merged) > 1 and len(inside(merged[0])) < 2:
+        merged[1][0] = merged[0][0]
+        merged.pop(0)
+    return merged
+
+
+def _assign_columns(lines, columns):
+    """Split lines into those spanning several columns and those inside one column"""
+    spanning = []
+    column_lines = [[] for _ in columns]
+    for line in lines:
+        overlapping = [i for i, (x0, x1) in enumerate(columns) if line["x0"] < x1 and line["x1"] > x0]
+        if len(overlapping) > 1:
+            spanning.append(line)
+            continue
+        if overlapping:
+            index = overlapping[0]
+        else:
+            # Falls into a gutter, use the nearest column
+            center = (line["x0"] + line["x1"]) / 2
+            index = min(range(len(columns)), key=lambda i: abs((columns[i][0] + columns[i][1]) / 2 - center))
+        column_lines[index].append(line)
+    return spanning, column_lines
+
+
+def _build_rows(lines):
+    """Group lines sharing a baseline into rows and join them left to right"""
+    rows = []
+    for line in sorted(lines, key=lambda l: (l["y0"], l["x0"])):
+        if rows and _same_row(rows[-1], line):
+            row = rows[-1]
+            row["lines"].append(line)
+            row["y0"] = min(row["y0"], line["y0"])
+            row["y1"] = max(row["y1"], line["y1"])
+        else:
+            rows.append({"y0": line["y0"], "y1": line["y1"], "lines": [line]})
+    return [" ".join(l["text"] for l in sorted(row["lines"], key=lambda l: l["x0"])) for row in rows]
+
+
+def _same_row(row, line):
+    overlap = min(row["y1"], line["y1"]) - max(row["y0"], line["y0"])
+    height = min(row["y1"] - row["y0"], line["y1"] - line["y0"])
+    return height > 0 and overlap >= 0.5 * height
+
+
+def _center_y(line):
+    return (line["y0"] + line["y1"]) / 2
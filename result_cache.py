@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+# Defaults for the processed-menu cache
+DEFAULT_CACHE_DIR = ".menu_cache"
+DEFAULT_MAX_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# Files are hashed in blocks of this size so they are never fully loaded
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ResultCache:
+    """
+    Content-addressed cache for processed menu results.
+
+    Entries live in an in-memory LRU tier backed by a JSON-file disk tier.
+    Both tiers are bounded by size (least recently used entries are evicted
+    first) and every entry carries an expiry time.
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+                 ttl: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+
+        self._lock = threading.RLock()
+        # key -> (expires_at, size, value)
+        self._memory: "OrderedDict[str, Tuple[Optional[float], int, Any]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None  # computed lazily on first disk write
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(content, prompt_version: str, model: str) -> str:
+        """
+        Build the cache key from the file content, prompt version and model name.
+        content is a bytes-like object or the path of a file, which is hashed in blocks.
+        """
+        h = hashlib.sha256()
+        if isinstance(content, (str, os.PathLike)):
+            with open(content, "rb") as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                    h.update(block)
+        else:
+            h.update(content)
+        h.update(b"\0" + prompt_version.encode("utf-8"))
+        h.update(b"\0" + model.encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, _, value = entry
+                if expires_at is not None and expires_at <= now:
+                    self._drop_memory(key)
+                    self._remove_disk(key)
+                    return None
+                self._memory.move_to_end(key)
+                return value
+
+            # Memory miss, try the disk tier and promote on hit
+            record = self._read_disk(key)
+            if record is None:
+                return None
+            expires_at = record.get("expires_at")
+            if expires_at is not None and expires_at <= now:
+                self._remove_disk(key)
+                return None
+            value = record.get("value")
+            self._put_memory(key, value, expires_at, len(json.dumps(value)))
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serialisable value under key"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        payload = json.dumps({"expires_at": expires_at, "value": value}, ensure_ascii=False)
+        with self._lock:
+            self._put_memory(key, value, expires_at, len(payload))
+            self._write_disk(key, payload)
+
+    def invalidate(self, key: str) -> bool:
+        """Remove a single entry from both tiers. Returns True if anything was removed."""
+        with self._lock:
+            removed = self._drop_memory(key)
+            return self._remove_disk(key) or removed
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for path, _, _ in self._disk_entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._disk_bytes = 0 if self.cache_dir else None
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers and return how many were removed, counting a key once"""
+        now = time.time()
+        removed = set()
+        with self._lock:
+            for key, (expires_at, _, _) in list(self._memory.items()):
+                if expires_at is not None and expires_at <= now:
+                    self._drop_memory(key)
+                    removed.add(key)
+            for path, _, _ in self._disk_entries():
+                key = os.path.splitext(os.path.basename(path))[0]
+                record = self._read_disk(key)
+                if record is None:
+                    continue
+                expires_at = record.get("expires_at")
+                if expires_at is not None and expires_at <= now:
+                    self._remove_disk(key)
+                    removed.add(key)
+        return len(removed)
+
+    # Memory tier
+
+    def _put_memory(self, key, value, expires_at, size):
+        self._drop_memory(key)
+        if size > self.max_memory_bytes:
+            return
+        self._memory[key] = (expires_at, size, value)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, (_, old_size, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+
+    def _drop_memory(self, key) -> bool:
+        entry = self._memory.pop(key, None)
+        if entry is None:
+            return False
+        self._memory_bytes -= entry[1]
+        return True
+
+    # Disk tier
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")  # type: ignore
+
+    def _disk_entries(self):
+        """Yield (path, size, mtime) for every file in the disk tier"""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                record = json.load(f)
+            # Touch the file so disk eviction follows access order
+            os.utime(path, None)
+            return record
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, payload):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+        if os.path.exists(path):
+            self._disk_bytes -= os.path.getsize(path)
+
+        # Write atomically so concurrent readers never see a partial file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self._disk_bytes += os.path.getsize(path)
+
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _remove_disk(self, key) -> bool:
+        if not self.cache_dir:
+            return False
+        path = self._disk_path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return False
+        if self._disk_bytes is not None:
+            self._disk_bytes -= size
+        return True
+
+    def _evict_disk(self):
+        # Oldest access time first
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        for path, size, _ in entries:
+            if self._disk_bytes <= self.max_disk_bytes:  # type: ignore
+                break
+            try:
+                os.remove(path)
+                self._disk_bytes -= size  # type: ignore
+            except OSError:
+                pass
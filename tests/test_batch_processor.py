@@ -0,0 +1,33 @@
+from batch_processor import LocalBatchBackend, collect_results, prepare_batch, submit_batch, wait_for_batch
+from test_menu_processor import FakeClient, processor
+
+MENU = "\n".join(
+    ["GETRÄNKE", "Cola 0,33l 3,50", "Fanta 0,33l 3,50", "SPEISEN"]
+    + [f"Gericht Nummer {n} mit Beilage {n + 5},50" for n in range(20)]
+    + ["DESSERTS", "Tiramisu hausgemacht 6,50", "Eis 4,50"]
+)
+
+
+def test_batch_round_trip_matches_interactive_run(tmp_path):
+    path = tmp_path / "menu.txt"
+    path.write_text(MENU, encoding="utf-8")
+    job_dir = str(tmp_path / "job")
+    expected = processor(chunk_tokens=60).process_menu_file(str(path), "menu.txt")
+
+    menu = processor(chunk_tokens=60)
+    menu.last_report = {"chunks": 99}
+    manifest = prepare_batch(menu, [str(path)], job_dir)
+    assert manifest["files"]["menu"]["overlaps"]
+    client = FakeClient()
+    backend = LocalBatchBackend(str(tmp_path / "local"),
+                                lambda body: client.generate_text(body["messages"][0]["content"]))
+    submit_batch(backend, job_dir)
+    assert wait_for_batch(backend, job_dir, poll_interval=0) == "completed"
+    # Responses are parsed in the job's output mode, not the processor's
+    menu.output_mode = "json_object"
+    items, errors = collect_results(menu, backend, job_dir)
+
+    assert errors == {"menu": []}
+    assert items["menu"] == expected
+    assert menu.last_report == {"chunks": 99}
+    assert menu.output_mode == "json_object"
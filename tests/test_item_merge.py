@@ -0,0 +1,56 @@
+from chunking import iter_menu_chunks
+from item_merge import ChunkItemMerger
+from token_budget import ChunkBudget
+
+
+def item(name, price):
+    return {"name": name, "price": price}
+
+
+def test_overlap_items_are_dropped_once():
+    merger = ChunkItemMerger()
+    assert merger.merge(0, [item("Cola", 350), item("Fanta", 350)]) == [item("Cola", 350), item("Fanta", 350)]
+    assert merger.merge(1, [item("fanta", "350"), item("Sprite", 350)], overlap=1) == [item("Sprite", 350)]
+    assert merger.duplicates == 1
+
+
+def test_items_outside_the_overlap_are_kept():
+    merger = ChunkItemMerger()
+    merger.merge(0, [item("Pizza Margherita", 850)])
+    # A section split without overlap: the same dish opens the next section
+    assert merger.merge(1, [item("Pizza Margherita", 850)], overlap=0) == [item("Pizza Margherita", 850)]
+    # Only the first overlap items of a chunk are compared
+    merger.merge(2, [item("Salat", 650), item("Suppe", 450)], overlap=0)
+    assert merger.merge(3, [item("Brot", 200), item("Salat", 650)], overlap=1) == [item("Brot", 200), item("Salat", 650)]
+    assert merger.duplicates == 0
+
+
+def test_chunks_report_their_overlap():
+    text = "\n".join(["SPEISEN"] + [f"Gericht Nummer {n} mit Beilage 9,50" for n in range(12)]
+                     + ["PIZZA"] + [f"Pizza Sorte {n} 8,50" for n in range(3)])
+    budget = ChunkBudget(input_tokens=60, total_tokens=10 ** 6, output_tokens=10 ** 6)
+    chunks = list(iter_menu_chunks([text], budget, overlap_lines=1))
+    assert len(chunks) > 2
+    assert chunks[0].overlap_items == 0
+    for previous, chunk in zip(chunks, chunks[1:]):
+        # The line after the header repeats the previous chunk's last line
+        repeated = chunk.splitlines()[1] == previous.splitlines()[-1]
+        assert chunk.overlap_items == (1 if repeated else 0)
+
+
+def test_section_split_keeps_repeated_dish():
+    text = "MITTAGSTISCH\nTagessuppe mit Brot 4,50\nPizza Margherita 8,50\nPIZZA\nPizza Margherita 8,50\nPizza Salami 9,50"
+    budget = ChunkBudget(input_tokens=24, total_tokens=10 ** 6, output_tokens=10 ** 6)
+    chunks = list(iter_menu_chunks([text], budget, overlap_lines=2))
+    assert [chunk.overlap_items for chunk in chunks] == [0, 0]
+    merger = ChunkItemMerger()
+    merger.merge(0, [item("Tagessuppe mit Brot", 450), item("Pizza Margherita", 850)], chunks[0].overlap_items)
+    kept = merger.merge(1, [item("Pizza Margherita", 850), item("Pizza Salami", 950)], chunks[1].overlap_items)
+    assert kept == [item("Pizza Margherita", 850), item("Pizza Salami", 950)]
+
+
+def test_merge_takes_the_overlap_of_the_first_call_with_items():
+    merger = ChunkItemMerger()
+    merger.merge(0, [item("Cola", 350)])
+    assert merger.merge(1, [], overlap=0) == []
+    assert merger.merge(1, [item("Cola", 350), item("Fanta", 350)], overlap=1) == [item("Fanta", 350)]
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from line_parser import MenuLineParser, split_tail
+
+
+def parser(header=None):
+    parser = MenuLineParser()
+    parser.header = header
+    return parser
+
+
+def test_split_tail():
+    assert split_tail("Pils 0,3l 3,20 0,5l 4,50") == ("Pils ", [("0,3l", "3,20"), ("0,5l", "4,50")])
+    assert split_tail("Kaffee € 2,80") == ("Kaffee ", [(None, "€ 2,80")])
+    assert split_tail("Foo bar") is None
+    assert split_tail("Menü 4,50 mit Salat") is None
+
+
+def test_parse_line_sizes_and_prices():
+    items = parser().parse_line("Cola 0,33l .... 3,50 €")
+    assert [(item["name"], item["price"], item["steuersatz"]) for item in items] == [("0.33L Cola", 350, 19)]
+    items = parser("Speisen").parse_line("12. Spaghetti 9,90 €")
+    assert [(item["name"], item["price"], item["warengruppe"]) for item in items] == [("Spaghetti", 990, "Speisen")]
+
+
+@pytest.mark.parametrize("line, price", [
+    ("Cola 3,50", 350), ("Cola 3.50 €", 350), ("Cola € 3,50", 350), ("Cola 3,50 EUR", 350),
+    ("Cola 3,50 Euro", 350), ("Cola 3,- €", 300), ("Cola $3.50", 350), ("Cola £ 3.50", 350),
+])
+def test_price_notations(line, price):
+    assert [item["price"] for item in parser("Getränke").parse_line(line)] == [price]
+
+
+@pytest.mark.parametrize("line", ["Cola 3,5", "Cola 3,50 Eurozone", "Cola 3,50 $$"])
+def test_unclear_prices_are_left_to_the_llm(line):
+    assert parser("Getränke").parse_line(line) is None
+
+
+def fields(header, line):
+    items = parser(header).parse_line(line)
+    return items and (items[0]["hauptgruppe"], items[0]["steuersatz"], items[0]["ausser_haus"])
+
+
+@pytest.mark.parametrize("header", ["Kleinigkeiten", "Abendkarte", "Speisen"])
+@pytest.mark.parametrize("line", ["Käseplatte 12,50", "Wurstplatte 11,00", "Grillplatte 18,90",
+                                  "Wurstbrot 5,50", "Pizzabrötchen 4,00", "Schweinebraten 14,50"])
+def test_food_compounds(header, line):
+    assert fields(header, line) == ("KÜCHE", 7, 1)
+
+
+@pytest.mark.parametrize("header", ["Kleinigkeiten", "Getränke", None])
+@pytest.mark.parametrize("line", ["Latte Macchiato 3,80", "Pfirsich-Eistee 3,20", "Tee 2,50",
+                                  "Weißwein 0,2l 5,50", "Apfelsaft 3,00"])
+def test_beverages(header, line):
+    assert fields(header, line) == ("THEKE", 19, 0)
+
+
+@pytest.mark.parametrize("header, line", [
+    ("Kleinigkeiten", "Salat mit Weißwein 9,00"),  # both classes in one name
+    ("Getränke", "Käseplatte 12,50"),  # header and name disagree
+    ("Speisen", "Apfelsaft 3,00"),
+    (None, "Wurstplatte 11,00"),  # food without a header has no warengruppe
+])
+def test_conflicts_are_left_to_the_llm(header, line):
+    assert parser(header).parse_line(line) is None
+
+
+def test_long_numeric_line_is_linear():
+    start = time.perf_counter()
+    for count in (22, 200, 2000):
+        assert parser().parse_line("Foo " + "1,00 " * count + "x") is None
+    assert time.perf_counter() - start < 1.0
+
+
+def test_segments_keep_menu_order():
+    text = ("GETRÄNKE\nCola 0,33l 3,50\nLimonade nach Art des Hauses mit Minze 4,20\nWasser 0,5l 2,80\n"
+            "Apfelsaft 0,2l 3,00\nSPEISEN\nPizza Margherita 8,50\nmit Tomaten\nSchnitzel Wiener Art mit Pommes 14,90\n"
+            "Käseplatte 12,50\n")
+    line_parser = MenuLineParser()
+    segments = [segment if isinstance(segment, str) else [item["name"] for item in segment]
+                for segment in line_parser.iter_segments([text])]
+    assert segments == [
+        ["0.33L Cola"], "GETRÄNKE", "Limonade nach Art des Hauses mit Minze 4,20", ["0.5L Wasser", "0.2L Apfelsaft"],
+        ["Pizza Margherita"], "SPEISEN", "Schnitzel Wiener Art mit Pommes 14,90", ["Käseplatte"],
+    ]
+
+
+def test_parsed_lines_between_llm_lines_go_to_the_llm():
+    text = "SPEISEN\nSchnitzel Wiener Art mit Pommes 14,90\nPizza Margherita 8,50\nmit Tomaten\nLasagne al forno 9,90 (1,2,3)\n"
+    line_parser = MenuLineParser()
+    segments = list(line_parser.iter_segments([text]))
+    assert segments == ["SPEISEN", "Schnitzel Wiener Art mit Pommes 14,90",
+                        "Pizza Margherita 8,50\nmit Tomaten\nLasagne al forno 9,90 (1,2,3)"]
+    assert (line_parser.resolved_lines, line_parser.items) == (0, 0)
@@ -0,0 +1,13 @@
+from llm_clients.factory import get_llm_client
+
+
+def test_router_backends_use_their_own_api_keys(monkeypatch):
+    monkeypatch.setenv("API", "default-key")
+    router = get_llm_client("router", backends=[
+        {"provider": "openai", "name": "primary", "api_key": "key-1"},
+        {"provider": "openai", "name": "backup", "api_key": "key-2"},
+        {"provider": "openai", "name": "default"},
+    ], record_path=None)
+    keys = {name: client.api_key for name, client, _ in router.backends}
+    assert keys == {"primary": "key-1", "backup": "key-2", "default": "default-key"}
+    assert [client.client.api_key for _, client, _ in router.backends] == ["key-1", "key-2", "default-key"]
@@ -0,0 +1,44 @@
+import json
+import re
+
+import pytest
+
+from llm_clients import BaseLLMClient, ClientCapabilities
+from menu_processor import MenuProcessor
+
+PRICED_LINE_PATTERN = re.compile(r"^(.*?)\s+(\d{1,4}),(\d{2})$")
+
+
+class FakeClient(BaseLLMClient):
+    """One item per priced line of the prompt's menu text"""
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        items = []
+        for line in prompt.split('"""')[1].splitlines():
+            match = PRICED_LINE_PATTERN.match(line.strip())
+            if match:
+                items.append({"name": match.group(1)[:20], "quantity": 1,
+                              "price": int(match.group(2)) * 100 + int(match.group(3)), "warengruppe": "Speisen",
+                              "hauptgruppe": "KÜCHE", "steuersatz": 7, "ordergruppe": "KÜCHE WARM", "ausser_haus": 1})
+        return json.dumps(items, ensure_ascii=False)
+
+    def get_capabilities(self, model: str) -> ClientCapabilities:
+        return ClientCapabilities(max_context_tokens=8192, max_output_tokens=8192, streaming=False, batch=False)
+
+
+def processor(**options):
+    processor = MenuProcessor(llm_provider="other", shared_client=False, output_mode="text", **options)
+    processor.llm = FakeClient()
+    return processor
+
+
+@pytest.mark.parametrize("concurrency", [1, 2, 4])
+def test_overlap_duplicates_are_removed_at_any_concurrency(tmp_path, concurrency):
+    path = tmp_path / "menu.txt"
+    path.write_text("\n".join(["SPEISEN"] + [f"Gericht Nummer {n} mit Beilage {n + 5},50" for n in range(30)]),
+                    encoding="utf-8")
+    menu = processor(rule_based=False, chunk_tokens=60, max_concurrency=concurrency)
+    items = list(menu.iter_menu_items(str(path), "menu.txt", stream=False))
+    assert len(items) == 30
+    assert len({item["name"] for item in items}) == 30
+    assert menu.last_report["overlap_duplicates"] > 0
@@ -0,0 +1,19 @@
+import time
+
+import pytest
+
+from result_cache import ResultCache
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_purge_expired_counts_each_expired_key_once(tmp_path, on_disk):
+    cache = ResultCache(cache_dir=str(tmp_path) if on_disk else None)
+    cache.set("expired-1", [1], ttl=0.01)
+    cache.set("expired-2", [2], ttl=0.01)
+    cache.set("fresh", [3], ttl=3600)
+    time.sleep(0.05)
+
+    assert cache.purge_expired() == 2
+    assert cache.purge_expired() == 0
+    assert cache.get("fresh") == [3]
+    assert cache.get("expired-1") is None
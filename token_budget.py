@@ -0,0 +1,99 @@
+import logging
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (context window, maximum output tokens) per model family, matched by longest prefix
+MODEL_LIMITS = {
+    "gpt-3.5-turbo": (16385, 4096),
+    "gpt-4": (8192, 8192),
+    "gpt-4-32k": (32768, 32768),
+    "gpt-4-turbo": (128000, 4096),
+    "gpt-4-1106": (128000, 4096),
+    "gpt-4-0125": (128000, 4096),
+    "gpt-4o": (128000, 16384),
+    "gpt-4o-mini": (128000, 16384),
+    "gpt-4.1": (1047576, 32768),
+    "o1": (200000, 100000),
+    "o3": (200000, 100000),
+    "o4-mini": (200000, 100000),
+}
+DEFAULT_MODEL_LIMITS = (8192, 4096)
+
+# Share of the context window kept free for tokenizer differences and message framing
+SAFETY_MARGIN = 0.1
+
+# One extracted item as a JSON object with all eight keys
+OUTPUT_TOKENS_PER_ITEM = 60
+
+
+class ChunkBudget(NamedTuple):
+    """Token limits for the menu text of one LLM call"""
+    input_tokens: int       # menu text per call
+    total_tokens: int       # menu text plus expected output, what is left of the context after the prompt
+    output_tokens: int      # expected output per call
+    output_tokens_per_item: int = OUTPUT_TOKENS_PER_ITEM
+
+
+def model_limits(model: str) -> Tuple[int, int]:
+    """(context window, max output tokens) for a model name such as 'gpt-4o-2024-08-06'"""
+    matches = [name for name in MODEL_LIMITS if model == name or model.startswith(name + "-")]
+    if not matches:
+        return DEFAULT_MODEL_LIMITS
+    return MODEL_LIMITS[max(matches, key=len)]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for menu text)"""
+    return max(1, (len(text) + 3) // 4)
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str) -> Callable[[str], int]:
+    """
+    Token counting function for a model. Uses tiktoken when it is installed and
+    its encoding can be loaded, otherwise the character-based estimate.
+    """
+    if TIKTOKEN_AVAILABLE:
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        except Exception as e:
+            # The encoding files are downloaded on first use
+            logger.warning("tiktoken encoding for %s unavailable, estimating tokens: %s", model, e)
+    return estimate_tokens
+
+
+def count_tokens(text: str, model: str) -> int:
+    return get_token_counter(model)(text)
+
+
+def chunk_budget(model: str, prompt_tokens: int, max_input_tokens: Optional[int] = None,
+                 output_tokens_per_item: int = OUTPUT_TOKENS_PER_ITEM,
+                 limits: Optional[Tuple[int, int]] = None) -> ChunkBudget:
+    """
+    Largest safe chunk for a model: the prompt, the menu text and the expected
+    output have to fit into the context window and the output into the model's
+    output limit. max_input_tokens optionally caps the menu text per call.
+    limits overrides model_limits(model), e.g. with a client's capabilities.
+    """
+    context, max_output = limits or model_limits(model)
+    total = int(context * (1 - SAFETY_MARGIN)) - prompt_tokens
+    output = int(min(max_output, context) * (1 - SAFETY_MARGIN))
+    if total <= output_tokens_per_item:
+        raise ValueError(f"Prompt of {prompt_tokens} tokens leaves no room for menu text in {model}")
+    input_tokens = total
+    if max_input_tokens:
+        input_tokens = min(input_tokens, max_input_tokens)
+    return ChunkBudget(input_tokens=input_tokens, total_tokens=total, output_tokens=output,
+                       output_tokens_per_item=output_tokens_per_item)